@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""Microbenchmark of the per-call overhead of an Api.
+
+The client does not send any request, so the timings only cover doclink's own
+work: copying request_meta and processing the args.
+
+    $ pip install -e .
+    $ python benchmarks/bench_call.py
+"""
+
+from __future__ import print_function
+
+import copy
+import timeit
+
+from functools import reduce
+from operator import or_
+
+from doclink import Consumer
+
+
+class NoopClient(object):
+
+    def request(self, request_meta):
+        return NoopResp()
+
+
+class NoopResp(object):
+    status_code = 200
+
+
+consumer = Consumer('http://localhost', client=NoopClient(),
+                    headers={'User-Agent': 'bench'})
+
+
+@consumer.get('/users/{user_id}/videos/{video_id}')
+def video_info(resp):
+    """
+    <meta>
+        args:
+            query:
+                - access_token
+                - openid:
+                    required: False
+                - page: 1
+                - size: 20
+            header:
+                - X-Request-Id:
+                    alias: request_id
+                    required: False
+    </meta>
+    """
+
+
+def legacy_process(api, kwargs):
+    """The arg processing before call plans: deepcopy and walk every group."""
+    input_kwargs = copy.copy(kwargs)
+    request_meta = copy.deepcopy(api.request_meta)
+
+    used_arg_set = reduce(
+        or_,
+        (arg_group.process_request_meta(request_meta, input_kwargs)
+         for arg_group in api.arg_groups))
+
+    for used_arg in used_arg_set:
+        input_kwargs.pop(used_arg, None)
+
+    request_meta.update(input_kwargs)
+    return request_meta
+
+
+def plan_process(api, kwargs):
+    request_meta = api.request_meta_copy
+    request_meta.update(api.call_plan.process(request_meta, kwargs))
+    return request_meta
+
+
+def main(number=20000):
+    kwargs = dict(user_id=1, video_id=2, access_token='token', page=3, request_id='id')
+
+    assert legacy_process(video_info, kwargs) == plan_process(video_info, kwargs)
+
+    for name, func in (('before (deepcopy + group walk)', legacy_process),
+                       ('after (call plan)', plan_process),
+                       ('full call (call plan)', lambda api, kw: api(**kw))):
+        seconds = min(timeit.repeat(lambda: func(video_info, kwargs), number=number, repeat=3))
+        print('{:<32}{:>8.2f} us/call'.format(name, seconds / number * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""Startup benchmark: build a consumer with 1,000 generated endpoints.
+
+Most of the endpoints share a few CRUD style meta docs, like a large SDK.
+
+    $ pip install -e .
+    $ python benchmarks/bench_startup.py
+"""
+
+from __future__ import print_function
+
+import time
+
+import yaml
+
+from doclink import Consumer
+from doclink import meta_parser
+
+ENDPOINT_COUNT = 1000
+
+META_DOCS = (
+    """
+    <meta>
+        args:
+            query:
+                - access_token
+                - openid:
+                    required: False
+                - page: 1
+                - size: 20
+    </meta>
+    """,
+    """
+    <meta>
+        timeout: 10
+        expected_status_code: 201
+        args:
+            query:
+                - access_token
+            json:
+                - title
+                - desc:
+                    required: False
+    </meta>
+    """,
+    """
+    <meta>
+        args:
+            query:
+                - access_token
+            header:
+                - If-Match:
+                    alias: etag
+    </meta>
+    """,
+)
+
+
+def create_func(index):
+    def func(resp):
+        pass
+
+    func.__name__ = 'endpoint_{}'.format(index)
+    func.__doc__ = META_DOCS[index % len(META_DOCS)]
+    return func
+
+
+def build_consumer(count=ENDPOINT_COUNT):
+    consumer = Consumer('http://localhost')
+
+    for i in range(count):
+        consumer.get('/resources_{}/{{resource_id}}'.format(i))(create_func(i))
+
+    return consumer
+
+
+def timed_build(name):
+    meta_parser.YamlParser._meta_dict_memo.clear()
+    start = time.time()
+    build_consumer()
+    print('{:<36}{:>8.1f} ms'.format(name, (time.time() - start) * 1e3))
+
+
+def main():
+    loader = meta_parser.SafeLoader
+    print('{} endpoints, loader: {}'.format(ENDPOINT_COUNT, loader.__name__))
+
+    timed_build('memoized')
+
+    load = meta_parser.YamlParser.load.__func__
+    try:
+        meta_parser.YamlParser.load = classmethod(lambda cls, meta_doc: yaml.load(meta_doc, loader))
+        timed_build('not memoized')
+
+        meta_parser.YamlParser.load = classmethod(
+            lambda cls, meta_doc: yaml.load(meta_doc, yaml.SafeLoader))
+        timed_build('not memoized, pure python loader')
+    finally:
+        meta_parser.YamlParser.load = classmethod(load)
+
+
+if __name__ == '__main__':
+    main()
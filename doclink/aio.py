@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""Asyncio support of Api, only importable on python 3.5+."""
+
+import inspect
+import sys
+
+from .middleware import run_after_handle, run_after_send, run_before_send, run_on_error
+
+
+async def handle_resp_async(api, resp_awaitable, kwargs):
+    """Await the response from an async client and handle it as a sync one.
+
+    Resp hooks and the api func run after the response is read. The result
+    is awaited if it's awaitable, so the api func can be a coroutine function.
+    """
+    resp = await resp_awaitable
+    api._enrich_resp(resp, kwargs)
+    result = api._handle_resp(resp)
+
+    if inspect.isawaitable(result):
+        result = await result
+
+    return result
+
+
+async def send_with_middlewares_async(request_meta, send, ctx):
+    """Send the request of an async call through the send hooks of middlewares."""
+    run_before_send(request_meta, ctx)
+
+    if ctx.resp is None:
+        ctx.resp = await send(ctx.request_meta)
+
+    return run_after_send(ctx)
+
+
+async def call_with_middlewares_async(call, ctx):
+    """Await call(ctx) through the build, error and handle hooks of middlewares."""
+    try:
+        for middleware in ctx.middlewares:
+            middleware.before_build(ctx)
+
+        ctx.result = await call(ctx)
+    except Exception:
+        return run_on_error(ctx, sys.exc_info(), ctx.middlewares)
+
+    return run_after_handle(ctx)
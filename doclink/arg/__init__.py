@@ -7,3 +7,4 @@ from .models import Arg
 from .models import ArgGroup
 from .models import ArgPredefine
 from .models import PredefinedArgGroup
+from .plan import CallPlan
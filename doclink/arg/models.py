@@ -124,7 +124,7 @@ class ArgGroup(object):
         # if all the args are not required, and no input values for them,
         # the arg_result will be an empty dict
         if arg_result:
-            param = request_meta.setdefault(self.group_name, {})
+            param = request_meta.field_for_update(self.group_name)
             param.update(arg_result)
 
     def process_request_meta(self, request_meta, input_kwargs):
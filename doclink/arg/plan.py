@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+from .models import Arg, ArgGroup
+
+
+def _is_overridden(obj, base_cls, method_names):
+    cls = type(obj)
+    return any(getattr(cls, name) is not getattr(base_cls, name)
+               for name in method_names)
+
+
+def _is_compilable(arg_group):
+    """Check whether an arg group follows the default ArgGroup processing.
+
+    Groups or args which customize the processing can not be flattened into
+    a CallPlan and are processed through ``process_request_meta`` on each call.
+    """
+    if not isinstance(arg_group, ArgGroup):
+        return False
+
+    if _is_overridden(arg_group, ArgGroup,
+                      ('process_request_meta', '_get_arg_result', '_update_request_meta')):
+        return False
+
+    return not any(_is_overridden(arg, Arg, ('output', '_validate'))
+                   for arg in arg_group.arg_map.values())
+
+
+class CallPlan(object):
+    """Flattened arg processing of an api, compiled from its arg groups.
+
+    Every arg of the compilable groups is put into a kwarg table, which maps the
+    input key(alias or name) to its group and arg. The fallback values(defaults or
+    values already in request_meta) are validated once when compiling.
+    Processing the kwargs of a call is then one pass over the incoming kwargs.
+
+    Attributes:
+        arg_table (dict): Map input key to a tuple of (group_name, arg).
+        fallbacks (dict): Map group_name to {arg_name: default} which will be
+            written when the arg is not in the input.
+        pending (list): (key, arg, current_kwargs) of args without validated fallback.
+            If the key is missing in the input, ``arg.output`` is called to get
+            the value or raise.
+        dynamic_groups (list): Arg groups processed through ``process_request_meta``.
+    """
+
+    def __init__(self, arg_groups, request_meta):
+        self.arg_table = {}
+        self.fallbacks = {}
+        self.pending = []
+        self.dynamic_groups = []
+
+        for arg_group in arg_groups:
+            if _is_compilable(arg_group):
+                self._compile_group(arg_group, request_meta)
+            else:
+                self.dynamic_groups.append(arg_group)
+
+    def _compile_group(self, arg_group, request_meta):
+        group_name = arg_group.group_name
+        current_kwargs = request_meta.get(group_name)
+
+        for arg in arg_group.arg_map.values():
+            key = arg.alias or arg.name
+            self.arg_table[key] = self.arg_table.get(key, ()) + ((group_name, arg),)
+
+            current_value = current_kwargs.get(arg.name) if current_kwargs else None
+            fallback = arg.default if arg.default is not None else current_value
+
+            if fallback is None:
+                if arg.required:
+                    self.pending.append((key, arg, current_kwargs))
+                continue
+
+            try:
+                arg._validate(fallback)
+            except Exception:
+                # raise it when the arg is missing in a call
+                self.pending.append((key, arg, current_kwargs))
+                continue
+
+            if arg.default is not None:
+                self.fallbacks.setdefault(group_name, {})[arg.name] = arg.default
+
+    def process(self, request_meta, kwargs):
+        """Write args of kwargs into request_meta.
+
+        Args:
+            request_meta (RequestMeta): A copy-on-write copy of the api's request_meta.
+            kwargs (dict): The input kwargs of a call.
+
+        Returns:
+            dict: The kwargs which are not used by any arg.
+        """
+        arg_table = self.arg_table
+        group_results = {}
+        unused_kwargs = {}
+
+        for key, value in kwargs.items():
+            entries = arg_table.get(key)
+            if entries is None:
+                unused_kwargs[key] = value
+                continue
+
+            for group_name, arg in entries:
+                arg._validate(value)
+                group_results.setdefault(group_name, {})[arg.name] = value
+
+        for key, arg, current_kwargs in self.pending:
+            if key not in kwargs:
+                arg.output(current_kwargs, kwargs)
+
+        for group_name, fallback in self.fallbacks.items():
+            result = group_results.get(group_name)
+            if result is None:
+                group_results[group_name] = fallback
+            else:
+                for arg_name, default in fallback.items():
+                    result.setdefault(arg_name, default)
+
+        for group_name, result in group_results.items():
+            request_meta.field_for_update(group_name).update(result)
+
+        for arg_group in self.dynamic_groups:
+            used_arg_set = arg_group.process_request_meta(request_meta, kwargs)
+            for used_arg in used_arg_set:
+                unused_kwargs.pop(used_arg, None)
+
+        return unused_kwargs
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+
+from collections import deque
+
+from .exceptions import CircuitOpenError
+
+_clock = getattr(time, 'monotonic', time.time)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class _Circuit(object):
+
+    def __init__(self, window_size):
+        self.state = CLOSED
+        self.outcomes = deque(maxlen=window_size)
+        self.failures = 0
+        self.opened_at = None
+        self.probes = 0
+
+
+class CircuitBreaker(object):
+    """Circuit breakers keyed by base_uri.
+
+    A circuit is closed at first, and trips open when the failure rate of its
+    last ``window_size`` calls reaches ``failure_rate``, once it has seen at
+    least ``min_calls`` calls. An open circuit fails calls fast with
+    CircuitOpenError. After ``reset_timeout`` seconds it's half open and lets
+    ``half_open_probes`` calls through: a successful probe closes it, a failed
+    one opens it again.
+
+    Args:
+        failure_rate (float): Failure rate to trip the circuit.
+        min_calls (int): Min calls in the window before the circuit can trip.
+        window_size (int): Number of the latest calls to calculate failure rate.
+        reset_timeout (float): Seconds the circuit stays open.
+        half_open_probes (int): Max concurrent calls in half open state.
+    """
+
+    def __init__(self, failure_rate=0.5, min_calls=10, window_size=50,
+                 reset_timeout=30, half_open_probes=1):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window_size = window_size
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_meta(cls, breaker_meta):
+        """Create from a dict of kwargs, or return the CircuitBreaker as is."""
+        if breaker_meta is None or isinstance(breaker_meta, CircuitBreaker):
+            return breaker_meta
+        else:
+            return cls(**breaker_meta)
+
+    def _get_circuit(self, key):
+        circuit = self._circuits.get(key)
+        if circuit is None:
+            circuit = self._circuits[key] = _Circuit(self.window_size)
+
+        return circuit
+
+    def _update_state(self, circuit):
+        if circuit.state == OPEN and _clock() - circuit.opened_at >= self.reset_timeout:
+            circuit.state = HALF_OPEN
+            circuit.probes = 0
+
+    def state(self, key):
+        """Get the state of the circuit of key: 'closed', 'open' or 'half_open'."""
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None:
+                return CLOSED
+
+            self._update_state(circuit)
+            return circuit.state
+
+    @property
+    def states(self):
+        """Map the key of each circuit to its state."""
+        with self._lock:
+            keys = list(self._circuits)
+
+        return dict((key, self.state(key)) for key in keys)
+
+    def before_call(self, key):
+        """Check whether a call of key can go through.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half open without free probes.
+        """
+        with self._lock:
+            circuit = self._get_circuit(key)
+            self._update_state(circuit)
+
+            if circuit.state == CLOSED:
+                return
+
+            if circuit.state == HALF_OPEN and circuit.probes < self.half_open_probes:
+                circuit.probes += 1
+                return
+
+            retry_after = max(0.0, circuit.opened_at + self.reset_timeout - _clock())
+
+        raise CircuitOpenError(key, retry_after)
+
+    def record_success(self, key):
+        with self._lock:
+            circuit = self._get_circuit(key)
+
+            if circuit.state == HALF_OPEN:
+                circuit.state = CLOSED
+                circuit.outcomes.clear()
+                circuit.failures = 0
+            elif circuit.state == CLOSED:
+                self._record(circuit, False)
+
+    def record_failure(self, key):
+        with self._lock:
+            circuit = self._get_circuit(key)
+
+            if circuit.state == HALF_OPEN:
+                self._open(circuit)
+            elif circuit.state == CLOSED:
+                self._record(circuit, True)
+
+                calls = len(circuit.outcomes)
+                if calls >= self.min_calls and circuit.failures >= self.failure_rate * calls:
+                    self._open(circuit)
+
+    def after_call(self, key, failed, elapsed=None):
+        """Record the outcome of a call, failed is None if it's neither."""
+        if failed:
+            self.record_failure(key)
+        elif failed is None:
+            self.release(key)
+        else:
+            self.record_success(key)
+
+    def release(self, key):
+        """Release the probe of a call which ended with neither success nor failure."""
+        with self._lock:
+            circuit = self._get_circuit(key)
+
+            if circuit.state == HALF_OPEN and circuit.probes > 0:
+                circuit.probes -= 1
+
+    @staticmethod
+    def _record(circuit, failed):
+        if len(circuit.outcomes) == circuit.outcomes.maxlen:
+            circuit.failures -= circuit.outcomes[0]
+
+        circuit.outcomes.append(failed)
+        circuit.failures += failed
+
+    @staticmethod
+    def _open(circuit):
+        circuit.state = OPEN
+        circuit.opened_at = _clock()
+        circuit.outcomes.clear()
+        circuit.failures = 0
@@ -1,14 +1,32 @@
 # -*- coding: utf-8 -*-
 
-import copy
+import threading
+import time
 
-from functools import reduce, partial
-from operator import or_
+from functools import partial
 
 from .request_meta import RequestMetaContainer
 from .utils import raw_args_from_uri
 from .meta_parser import creat_parser
-from .arg import create_group
+from .arg import create_group, CallPlan
+from .bulk import map_calls
+from .cache import RespCache
+from .coalesce import SingleFlight
+from .retry import RetryPolicy
+from .stream import StreamReader
+from .upload import ChunkedUploader
+from .metrics import PhaseTimer
+from .json_backend import memoize_json
+from .middleware import CallContext, call_with_middlewares, send_with_middlewares
+from .exceptions import StatusCodeUnexpectedError
+
+try:
+    from .aio import (
+        handle_resp_async, call_with_middlewares_async, send_with_middlewares_async)
+except SyntaxError:  # python 2
+    handle_resp_async = call_with_middlewares_async = send_with_middlewares_async = None
+
+_clock = getattr(time, 'monotonic', time.time)
 
 
 class Api(RequestMetaContainer):
@@ -19,79 +37,391 @@ class Api(RequestMetaContainer):
         self.consumer = consumer
         self.func = func
         self.arg_groups = []
-        self.request_meta = consumer.request_meta_copy
+        self.request_meta = consumer.request_meta.deepcopy()
         self.request_meta.update(
             uri=uri,
             method=http_method)
         self.expected_status_code = consumer.expected_status_code
         self.resp_hooks = [consumer.hook]
+        self._resp_pipeline = None
         self._on_request = None
+        self._call_plan = None
+        self.resp_cache = None
+        self.singleflight = getattr(consumer, 'singleflight', None)
+        self.retry_policy = getattr(consumer, 'retry_policy', None)
+        self.circuit_breaker = getattr(consumer, 'circuit_breaker', None)
+        self.stream_reader = None
+        self.chunked_uploader = None
+        self.metrics = getattr(consumer, 'metrics', None)
+        self.middlewares = []
 
     def on_request(self, callback):
         self._on_request = callback
 
+    def use(self, middleware):
+        """Add a middleware of this api, run after the consumer's middlewares."""
+        self.middlewares.append(middleware)
+        return middleware
+
     def add_resp_hook(self, hook):
         if not callable(hook):
             raise ValueError('resp_hook must be callable')
 
         self.resp_hooks.append(hook)
+        self._resp_pipeline = None
+
+    @property
+    def expected_status_code(self):
+        return self._expected_status_code
+
+    @expected_status_code.setter
+    def expected_status_code(self, status_code):
+        self._expected_status_code = status_code
+        self._resp_pipeline = None
+
+    @property
+    def resp_pipeline(self):
+        """Resp hooks of the consumer and this api compiled into one callable.
+
+        The consumer hook is flattened into its hooks, and the status check is
+        compiled with expected_status_code. It's recompiled lazily after the
+        hooks or expected_status_code changed.
+        """
+        if self._resp_pipeline is None:
+            self._resp_pipeline = self._compile_resp_hooks()
+
+        return self._resp_pipeline
+
+    def _compile_resp_hooks(self):
+        from .consumer import Consumer
+
+        consumer = self.consumer
+        # only the default status check is compiled, not an override of subclasses
+        check_status = Consumer._check_status
+        hooks = []
+
+        for hook in self.resp_hooks:
+            if hook == consumer.hook:
+                hooks.extend(consumer.resp_hooks)
+            else:
+                hooks.append(hook)
+
+        status_hook = None
+        if self.expected_status_code is not None:
+            status_hook = create_status_hook(int(self.expected_status_code))
+
+        hooks = [status_hook if hook is check_status else hook for hook in hooks]
+
+        return chain_resp_hooks([hook for hook in hooks if hook is not None])
 
-    def _handle_resp(self, resp):
-        for resp_hook in self.resp_hooks:
-            hook_result = resp_hook(resp)
+    def _handle_resp(self, resp, timer=None):
+        if self.stream_reader is not None:
+            return self._handle_stream_resp(resp, timer)
 
-            if hook_result is not None:
-                return hook_result
+        hook_result = self.resp_pipeline(resp)
+
+        if hook_result is not None:
+            if timer is not None:
+                timer.lap('hooks')
+            return hook_result
+
+        if timer is not None:
+            timer.lap('hooks')
 
         result = self.func(resp)
+
+        if timer is not None:
+            timer.lap('handler')
+
         if result is None:
             return resp
         else:
             return result
 
+    def _handle_stream_resp(self, resp, timer=None):
+        """Handle a streamed resp, func gets its ResponseStream instead of resp.
+
+        Resp hooks can read the stream as ``resp.body_stream``. It's returned
+        if func returns None, otherwise it's closed after the hooks or func
+        returned or raised, so the connection is released to the pool.
+        """
+        stream = resp.body_stream = self.stream_reader(resp)
+        result = None
+
+        try:
+            result = self.resp_pipeline(resp)
+
+            if timer is not None:
+                timer.lap('hooks')
+
+            if result is None:
+                result = self.func(stream)
+
+                if timer is not None:
+                    timer.lap('handler')
+
+                if result is None:
+                    result = stream
+        finally:
+            if result is not stream:
+                stream.close()
+
+        return result
+
     def _enrich_resp(self, resp, kwargs):
         """Add some extra attrs to resp.
 
-        Resp hook can use these extra attrs for process.
+        Resp hook can use these extra attrs for process. ``resp.json()`` is
+        decoded by the json backend and memoized.
         """
         resp.caller = self
         resp.input_kwargs = kwargs
+        memoize_json(resp)
 
     def add_arg_group(self, arg_group):
         self.arg_groups.append(arg_group)
+        self._call_plan = None
 
     def update_request_meta(self, *args, **kwargs):
         self.request_meta.update(*args, **kwargs)
+        self._call_plan = None
+
+    @property
+    def call_plan(self):
+        """CallPlan compiled from arg_groups and request_meta.
+
+        It's compiled when the api is built, and recompiled lazily after
+        arg groups or request_meta changed.
+        """
+        if self._call_plan is None:
+            self._call_plan = CallPlan(self.arg_groups, self.request_meta)
+
+        return self._call_plan
+
+    def compile(self):
+        self._call_plan = CallPlan(self.arg_groups, self.request_meta)
+        self._check_async_client()
+
+    # attrs wrapping the send of sync clients, by their meta names
+    _sync_only_attrs = (
+        ('cache', 'resp_cache'),
+        ('coalesce', 'singleflight'),
+        ('retry', 'retry_policy'),
+        ('circuit_breaker', 'circuit_breaker'),
+        ('stream', 'stream_reader'))
+
+    def _check_async_client(self):
+        """Raise if the api is set with features async clients don't support."""
+        if not getattr(self.consumer.client, 'is_async', False):
+            return
+
+        unsupported = [name for name, attr in self._sync_only_attrs
+                       if getattr(self, attr, None) is not None]
+        if unsupported:
+            raise ValueError('{} of api {} not supported by async clients'.format(
+                ', '.join(unsupported), self.name))
 
     def __call__(self, **kwargs):
-        input_kwargs = copy.copy(kwargs)
-        request_meta = self.request_meta_copy
+        if self.metrics is None or getattr(self.consumer.client, 'is_async', False):
+            return self._call(kwargs)
+        else:
+            return self._call_timed(kwargs)
+
+    def _call_timed(self, kwargs):
+        """Call with the phases timed, and record the timings to metrics."""
+        timer = PhaseTimer()
+        error = True
+        try:
+            result = self._call(kwargs, timer)
+            error = False
+            return result
+        finally:
+            timer.stop()
+            self.metrics.record(self.name, timer.timings, error)
 
-        # merge all the used_arg_set
-        if self.arg_groups:
-            used_arg_set = reduce(
-                or_,
-                (arg_group.process_request_meta(request_meta, input_kwargs)
-                 for arg_group in self.arg_groups))
+    def _call(self, kwargs, timer=None):
+        consumer_middlewares = self.consumer.middlewares
+        if not (consumer_middlewares or self.middlewares):
+            return self._call_api(kwargs, timer)
 
-            for used_arg in used_arg_set:
-                input_kwargs.pop(used_arg, None)
+        ctx = CallContext(self, kwargs, consumer_middlewares + self.middlewares,
+                          timer.timings if timer is not None else None)
 
-        request_meta.update(input_kwargs)
+        if getattr(self.consumer.client, 'is_async', False):
+            return call_with_middlewares_async(
+                lambda ctx: self._call_api(ctx.kwargs, ctx=ctx), ctx)
+
+        return call_with_middlewares(lambda ctx: self._call_api(ctx.kwargs, timer, ctx), ctx)
+
+    def _call_api(self, kwargs, timer=None, ctx=None):
+        request_meta = self.request_meta_copy
+        request_meta.update(self.call_plan.process(request_meta, kwargs))
 
         if self._on_request:
+            request_meta.own_fields()
             self._on_request(request_meta)
 
-        resp = self.consumer.client.request(request_meta)
+        client = self.consumer.client
+
+        if getattr(client, 'is_async', False):
+            send = client.request
+            if ctx is not None:
+                send = partial(send_with_middlewares_async, send=send, ctx=ctx)
+            return handle_resp_async(self, send(request_meta), kwargs)
+
+        if timer is not None:
+            timer.lap('args')
+            # clients expand the url again, the template is compiled and cached
+            request_meta.get_url()
+            timer.lap('url')
+
+        send = self._build_send(client, ctx)
+
+        trackers = self._get_trackers()
+        if trackers:
+            return self._call_tracked(trackers, client, send, request_meta, kwargs, timer)
+        else:
+            return self._send_and_handle(send, request_meta, kwargs, timer)
+
+    def _build_send(self, client, ctx=None):
+        """Chain the send wrappers around client.request.
+
+        From inner to outer: the send hooks of middlewares, retries,
+        coalescing and the resp cache.
+        """
+        send = client.request
+        if ctx is not None:
+            send = partial(send_with_middlewares, send=send, ctx=ctx)
+        if self.retry_policy is not None:
+            send = partial(self.retry_policy.request, send=send,
+                           on_exceptions=getattr(client, 'retryable_exceptions', None))
+        if self.singleflight is not None:
+            send = partial(self.singleflight.request, send=send)
+        if self.resp_cache is not None:
+            send = partial(self.resp_cache.request, send=send)
+
+        return send
+
+    def _get_trackers(self):
+        """Get the objects tracking the outcome of calls, keyed by base_uri."""
+        trackers = []
+
+        if self.circuit_breaker is not None:
+            trackers.append(self.circuit_breaker)
+
+        router = self.consumer.router
+        if hasattr(router, 'after_call'):
+            trackers.append(router)
+
+        return trackers
+
+    def _send_and_handle(self, send, request_meta, kwargs, timer=None):
+        resp = send(request_meta)
+
+        if timer is not None:
+            timer.lap('send')
+            resp.timings = timer.timings
+
         self._enrich_resp(resp, kwargs)
 
-        return self._handle_resp(resp)
+        return self._handle_resp(resp, timer)
+
+    def _call_tracked(self, trackers, client, send, request_meta, kwargs, timer=None):
+        """Call and report the outcome to trackers, such as the circuit breaker.
+
+        Transport errors and unexpected status codes count as failures, other
+        exceptions are neither successes nor failures. A tracker can reject
+        the call by raising in ``before_call``.
+        """
+        key = request_meta['base_uri']
+        failures = (StatusCodeUnexpectedError,) + tuple(
+            getattr(client, 'retryable_exceptions', None) or (IOError,))
+
+        for tracker in trackers:
+            tracker.before_call(key)
+
+        start = _clock()
+        failed = None
+        try:
+            result = self._send_and_handle(send, request_meta, kwargs, timer)
+            failed = False
+            return result
+        except failures:
+            failed = True
+            raise
+        finally:
+            elapsed = _clock() - start
+            for tracker in trackers:
+                tracker.after_call(key, failed, elapsed)
+
+    def map(self, kwargs_iterable, concurrency=10, ordered=True, return_exceptions=False):
+        """Call this api with each kwargs of kwargs_iterable on a bounded thread pool.
+
+        See ``doclink.bulk.map_calls`` for args.
+        """
+        return map_calls(((self, kwargs) for kwargs in kwargs_iterable),
+                         concurrency, ordered, return_exceptions)
+
+    def upload_chunks(self, file_path, checkpoint=None, **kwargs):
+        """Upload a file in chunks, calling this api per chunk.
+
+        The chunking is declared by the ``chunked_upload`` item of api meta,
+        see ``doclink.upload.ChunkedUploader``.
+
+        Args:
+            file_path (str): Path of the file.
+            checkpoint (str): Path of a checkpoint file to resume the upload.
+            kwargs: Other kwargs of each call.
+
+        Returns:
+            list: Results of the calls in chunk order.
+        """
+        if getattr(self.consumer.client, 'is_async', False):
+            raise ValueError('chunked upload requires a sync client')
+
+        uploader = self.chunked_uploader or ChunkedUploader()
+        return uploader.upload(self, file_path, checkpoint, **kwargs)
 
     def partial(self, *args, **kwargs):
         return partial(self, *args, **kwargs)
 
     def routing(self, route_key):
-        return self.partial(base_uri=self.consumer.get_routed_uri(route_key))
+        return self.consumer.routing(route_key).bind(self)
+
+
+def _no_resp_hook(resp):
+    return None
+
+
+def create_status_hook(expected_status_code):
+    """Create a resp hook raising if status_code isn't expected_status_code."""
+    def check_status(resp):
+        status_code = resp.status_code
+
+        # status_code may be a str, only convert it when not equal
+        if status_code != expected_status_code and int(status_code) != expected_status_code:
+            raise StatusCodeUnexpectedError(expected_status_code, status_code, resp)
+
+    return check_status
+
+
+def chain_resp_hooks(hooks):
+    """Chain resp hooks into one, the first result not None is returned."""
+    if not hooks:
+        return _no_resp_hook
+
+    if len(hooks) == 1:
+        return hooks[0]
+
+    hooks = tuple(hooks)
+
+    def run_hooks(resp):
+        for hook in hooks:
+            result = hook(resp)
+            if result is not None:
+                return result
+
+    return run_hooks
 
 
 class ApiBuilder(object):
@@ -128,15 +458,88 @@ class ApiBuilder(object):
     def build_expected_status_code(self, status_code):
         self._api.expected_status_code = status_code
 
+    def build_cache(self, cache_meta):
+        self._api.resp_cache = RespCache.from_meta(cache_meta)
+
+    def build_coalesce(self, coalesce_meta):
+        self._api.singleflight = SingleFlight.from_meta(coalesce_meta)
+
+    def build_retry(self, retry_meta):
+        self._api.retry_policy = RetryPolicy.from_meta(
+            retry_meta, budget=getattr(self._api.consumer, 'retry_budget', None))
+
+    def build_stream(self, stream_meta):
+        self._api.stream_reader = StreamReader.from_meta(stream_meta)
+        self._api.update_request_meta(stream=self._api.stream_reader is not None)
+
+    def build_chunked_upload(self, upload_meta):
+        self._api.chunked_uploader = ChunkedUploader.from_meta(upload_meta)
+
     def build(self):
         if self.parser:
             self.parser.set_builder(self)
             self.parser.parse()
 
+        self._api.compile()
+
         return self._api
 
 
-def build_api(consumer, http_method, uri, func, arg_validators=None, on_request=None):
+_lazy_build_lock = threading.RLock()
+
+
+class LazyApi(Api):
+    """Api whose pydoc meta is parsed and built on first use.
+
+    Only the attrs which don't depend on the api meta are set when declared.
+    Accessing any other attr, or calling the api, builds it with ApiBuilder and
+    takes over the attrs of the built api. The consumer's request_meta is
+    copied at that time instead of at declaration.
+    """
+
+    def __init__(self, consumer, http_method, uri, func,
+                 arg_validators=None, on_request=None):
+        self.name = func.__name__
+        self.consumer = consumer
+        self.func = func
+        self.resp_hooks = [consumer.hook]
+        self._on_request = on_request
+        self._build_args = (http_method, uri, arg_validators)
+
+    @property
+    def built(self):
+        return '_build_args' not in self.__dict__
+
+    def build(self):
+        if self.built:
+            return
+
+        with _lazy_build_lock:
+            build_args = self.__dict__.get('_build_args')
+            if build_args is None:
+                return
+
+            http_method, uri, arg_validators = build_args
+            api = build_api(self.consumer, http_method, uri, self.func, arg_validators)
+
+            attrs = dict((name, value) for name, value in api.__dict__.items()
+                         if name not in self.__dict__)
+            self.__dict__.update(attrs)
+            del self._build_args
+
+    def __getattr__(self, name):
+        if name.startswith('__') or self.built:
+            raise AttributeError(name)
+
+        self.build()
+        return getattr(self, name)
+
+
+def build_api(consumer, http_method, uri, func, arg_validators=None, on_request=None,
+              lazy=False):
+    if lazy:
+        return LazyApi(consumer, http_method, uri, func, arg_validators, on_request)
+
     parser = creat_parser(func.__doc__)
     builder = ApiBuilder(consumer, http_method, uri, func, parser, arg_validators, on_request)
     return builder.build()
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+def _call(func, kwargs, return_exceptions):
+    try:
+        return func(**kwargs)
+    except Exception as e:
+        if return_exceptions:
+            return e
+        raise
+
+
+def map_calls(calls, concurrency=10, ordered=True, return_exceptions=False):
+    """Run calls on a bounded thread pool.
+
+    At most ``concurrency`` calls are submitted at a time, so calls can be a
+    lazy iterable of any size.
+
+    Args:
+        calls (iterable): (func, kwargs) pairs, func is usually an Api.
+        concurrency (int): Max number of threads.
+        ordered (bool): If True, yield results in the order of calls.
+            Else yield (index, result) pairs as they complete.
+        return_exceptions (bool): If True, an exception raised by a call is
+            yielded as its result. Else the first exception is raised and the
+            calls not started yet are cancelled.
+
+    Yields:
+        The results of calls.
+    """
+    if concurrency < 1:
+        raise ValueError('concurrency must be positive')
+
+    calls = enumerate(calls)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        def submit_next():
+            for index, (func, kwargs) in calls:
+                future = executor.submit(_call, func, kwargs, return_exceptions)
+                future.index = index
+                return future
+
+        pending = deque()
+        try:
+            for _ in range(concurrency):
+                future = submit_next()
+                if future is None:
+                    break
+                pending.append(future)
+
+            while pending:
+                if ordered:
+                    done = [pending.popleft()]
+                else:
+                    done_set = wait(pending, return_when=FIRST_COMPLETED).done
+                    done = [future for future in pending if future in done_set]
+                    for future in done:
+                        pending.remove(future)
+
+                for future in done:
+                    result = future.result()
+                    next_future = submit_next()
+                    if next_future is not None:
+                        pending.append(next_future)
+
+                    yield result if ordered else (future.index, result)
+        finally:
+            for future in pending:
+                future.cancel()
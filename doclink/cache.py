@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+
+import copy
+import threading
+import time
+
+from collections import OrderedDict
+
+from six import string_types
+
+_clock = getattr(time, 'monotonic', time.time)
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), str(v)) for k, v in value.items()))
+
+    return None if value is None else str(value)
+
+
+def _get_header(resp, name):
+    headers = getattr(resp, 'headers', None) or {}
+    return headers.get(name) or headers.get(name.lower())
+
+
+class RespCache(object):
+    """LRU cache of responses with TTL, for idempotent apis.
+
+    Responses are keyed by method, expanded url, query params, auth, cookies
+    and the values of the Authorization, Cookie and selected headers, so
+    callers with different credentials don't share responses. A hit returns
+    a shallow copy of the cached response, so resp hooks can set attrs on it.
+    Responses of async clients are not cached.
+
+    With revalidate, a stale response with ETag or Last-Modified is kept.
+    The next request is sent with If-None-Match or If-Modified-Since, and
+    a 304 serves the cached response, with status code of the cached one.
+
+    Args:
+        ttl (float): Seconds a response is fresh for.
+        maxsize (int): Max number of cached responses.
+        max_bytes (int): Max total size of cached response bodies, None for no limit.
+        headers (list[str]): Request headers which are part of the key, besides
+            Authorization and Cookie.
+        methods (list[str]): Cacheable http methods.
+        status_codes (list[int]): Cacheable status codes.
+        revalidate (bool): Revalidate stale responses with their validators.
+
+    Attributes:
+        hits (int): Number of requests served from fresh cache.
+        revalidated (int): Number of requests served from cache after a 304.
+        misses (int): Number of cacheable requests which got a new response.
+    """
+
+    def __init__(self, ttl=60, maxsize=128, max_bytes=None, headers=(),
+                 methods=('get', 'head'), status_codes=(200,), revalidate=True):
+        self.ttl = ttl
+        self.revalidate = revalidate
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        if isinstance(headers, string_types):
+            headers = [headers]
+        self.key_headers = ('authorization', 'cookie') + tuple(
+            header.lower() for header in headers
+            if header.lower() not in ('authorization', 'cookie'))
+        self.methods = frozenset(method.lower() for method in methods)
+        self.status_codes = frozenset(status_codes)
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_meta(cls, cache_meta):
+        """Create from the cache item of api meta, a dict of kwargs, a ttl or a bool."""
+        if isinstance(cache_meta, dict):
+            return cls(**cache_meta)
+        elif cache_meta is True:
+            return cls()
+        elif cache_meta:
+            return cls(ttl=cache_meta)
+        else:
+            return None
+
+    @property
+    def stats(self):
+        return {'hits': self.hits, 'revalidated': self.revalidated, 'misses': self.misses,
+                'size': len(self._entries), 'bytes': self._size}
+
+    def is_cacheable(self, request_meta):
+        return (request_meta['method'].lower() in self.methods and
+                not request_meta.get('stream'))
+
+    def key(self, request_meta):
+        params = request_meta.get('params') or {}
+        headers = dict((name.lower(), value) for name, value in
+                       (request_meta.get('headers') or {}).items())
+
+        return (request_meta['method'].lower(),
+                request_meta.get_url(),
+                tuple(sorted((str(k), str(v)) for k, v in params.items())),
+                tuple(headers.get(name) for name in self.key_headers),
+                _freeze(request_meta.get('auth')),
+                _freeze(request_meta.get('cookies')))
+
+    def get(self, key):
+        """Get the fresh response of key."""
+        resp, fresh = self._lookup(key)
+        return resp if fresh else None
+
+    def _lookup(self, key):
+        """Get the cached response of key and whether it's fresh.
+
+        A stale response is kept only if it can be revalidated.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, False
+
+            expires_at, resp, _ = entry
+            fresh = expires_at > _clock()
+            if not (fresh or self.revalidate and self._validators(resp)):
+                self._remove(key)
+                return None, False
+
+            self._move_to_end(key)
+
+        return resp, fresh
+
+    @staticmethod
+    def _validators(resp):
+        validators = {}
+
+        etag = _get_header(resp, 'ETag')
+        if etag:
+            validators['If-None-Match'] = etag
+
+        last_modified = _get_header(resp, 'Last-Modified')
+        if last_modified:
+            validators['If-Modified-Since'] = last_modified
+
+        return validators
+
+    def set(self, key, resp):
+        size = len(getattr(resp, 'content', None) or b'')
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (_clock() + self.ttl, resp, size)
+            self._size += size
+
+            while (len(self._entries) > self.maxsize or
+                   (self.max_bytes is not None and self._size > self.max_bytes)):
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._size -= size
+
+    def _move_to_end(self, key):
+        self._entries[key] = self._entries.pop(key)
+
+    def request(self, request_meta, send):
+        """Get the response of request_meta from cache, or send and cache it.
+
+        Args:
+            request_meta (RequestMeta): Request to send.
+            send (callable): Send request_meta and return the response,
+                such as ``client.request``.
+        """
+        if not self.is_cacheable(request_meta):
+            return send(request_meta)
+
+        key = self.key(request_meta)
+        cached_resp, fresh = self._lookup(key)
+
+        if fresh:
+            self._count('hits')
+            return self._from_cache(cached_resp)
+
+        validators = self._validators(cached_resp) if cached_resp is not None else None
+        if validators:
+            headers = request_meta.field_for_update('headers')
+            for name, value in validators.items():
+                headers.setdefault(name, value)
+
+        resp = send(request_meta)
+        status_code = int(resp.status_code)
+
+        if validators and status_code == 304:
+            self._count('revalidated')
+            self.set(key, cached_resp)
+            return self._from_cache(cached_resp)
+
+        self._count('misses')
+        if status_code in self.status_codes:
+            # cache a copy, the attrs set by resp hooks are not cached
+            self.set(key, copy.copy(resp))
+
+        return resp
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    @staticmethod
+    def _from_cache(cached_resp):
+        resp = copy.copy(cached_resp)
+        resp.from_cache = True
+        return resp
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+
+import io
+import json
+import os
+import ssl
+
+import aiohttp
+from six import string_types
+
+from .. import json_backend
+from ..utils import guess_filename
+
+
+class AiohttpResponse(object):
+    """Response read from aiohttp.
+
+    The body is read before resp hooks run, so it offers the sync attrs of
+    requests.Response commonly used by resp hooks.
+
+    Attributes:
+        raw (aiohttp.ClientResponse): The released aiohttp response.
+        content (bytes): The response body.
+    """
+
+    def __init__(self, raw, content):
+        self.raw = raw
+        self.content = content
+        self.status_code = raw.status
+        self.reason = raw.reason
+        self.headers = raw.headers
+        self.cookies = raw.cookies
+        self.url = str(raw.url)
+        self.encoding = raw.get_encoding()
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors='replace')
+
+    def json(self, **kwargs):
+        if kwargs:
+            return json.loads(self.text, **kwargs)
+
+        return json_backend.loads(self.text)
+
+
+class AiohttpClient(object):
+    """Async client based on aiohttp.
+
+    Its ``request`` is a coroutine function, so the Api calls of a consumer
+    using it return awaitables.
+
+    Args:
+        session (aiohttp.ClientSession): Created on first request if not given.
+        session_kwargs: kwargs to create the session.
+    """
+
+    is_async = True
+
+    optional_args = (
+        'params', 'data', 'headers', 'cookies', 'files',
+        'auth', 'timeout', 'allow_redirects', 'proxies',
+        'verify', 'cert', 'json', 'multipart')
+
+    def __init__(self, session=None, **session_kwargs):
+        self._session = session
+        self._session_kwargs = session_kwargs
+
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = aiohttp.ClientSession(**self._session_kwargs)
+
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    @classmethod
+    def _prepare_optional_args(cls, sending_kwargs, request_meta, opened_files):
+        form_fields = {}
+
+        for arg in cls.optional_args:
+            value = request_meta.get(arg)
+            if value is None:
+                continue
+
+            if arg == 'params':
+                sending_kwargs['params'] = dict(
+                    (k, str(v) if isinstance(v, bool) else v)
+                    for k, v in value.items() if v is not None)
+            elif arg == 'headers':
+                sending_kwargs['headers'] = dict(
+                    (k, v) for k, v in value.items() if v is not None)
+            elif arg == 'data' and isinstance(value, dict):
+                form_fields = dict((k, v) for k, v in value.items() if v is not None)
+                sending_kwargs['data'] = form_fields
+            elif arg == 'auth':
+                cls._prepare_auth_arg(sending_kwargs, value)
+            elif arg == 'timeout':
+                sending_kwargs['timeout'] = cls._create_timeout_arg(value)
+            elif arg == 'proxies':
+                proxy = cls._select_proxy(value, request_meta.get_url())
+                if proxy:
+                    sending_kwargs['proxy'] = proxy
+            elif arg in ('verify', 'cert'):
+                ssl_arg = cls._create_ssl_arg(request_meta.get('verify'), request_meta.get('cert'))
+                if ssl_arg is not None:
+                    sending_kwargs['ssl'] = ssl_arg
+            elif arg == 'files':
+                sending_kwargs['data'] = cls._create_form_data(
+                    form_fields, value, opened_files, content_as_file=True)
+            elif arg == 'multipart':
+                sending_kwargs['data'] = cls._create_form_data(
+                    {}, value, opened_files, content_as_file=False)
+            elif arg == 'json' and 'data' not in sending_kwargs and \
+                    json_backend.get_json_backend() is not None:
+                sending_kwargs['data'] = json_backend.dumps(value)
+                headers = sending_kwargs.setdefault('headers', {})
+                if not any(name.lower() == 'content-type' for name in headers):
+                    headers['Content-Type'] = 'application/json'
+            else:
+                sending_kwargs[arg] = value
+
+    @classmethod
+    def _get_sending_kwargs(cls, request_meta, opened_files):
+        sending_kwargs = {}
+        sending_kwargs.update(
+            method=request_meta['method'],
+            url=request_meta.get_url(),
+        )
+        cls._prepare_optional_args(sending_kwargs, request_meta, opened_files)
+
+        return sending_kwargs
+
+    @classmethod
+    def _create_form_data(cls, form_fields, files_meta, opened_files, content_as_file):
+        """Create multipart/form-data of form fields and files.
+
+        Args:
+            form_fields (dict): Form fields sent with the files, like requests does.
+            files_meta (dict): Map field name to file_info or a list of file_info.
+                File_info can be a file path, a file object, content or a tuple
+                of (filename, file object or content[, content_type]).
+            opened_files (list): Files opened from file paths are appended to it.
+            content_as_file (bool): If True, str/bytes content is sent as a file
+                named by the field, else str content is sent as a form field.
+        """
+        form_data = aiohttp.FormData()
+
+        for field, value in form_fields.items():
+            form_data.add_field(field, value if isinstance(value, string_types) else str(value))
+
+        for field, file_infos in files_meta.items():
+            if not isinstance(file_infos, list):
+                file_infos = [file_infos]
+
+            for file_info in file_infos:
+                cls._add_file_field(form_data, field, file_info, opened_files, content_as_file)
+
+        return form_data
+
+    @classmethod
+    def _add_file_field(cls, form_data, field, file_info, opened_files, content_as_file):
+        content_type = None
+
+        if isinstance(file_info, tuple):
+            filename, value = file_info[:2]
+            if len(file_info) > 2:
+                content_type = file_info[2]
+        elif isinstance(file_info, string_types) and os.path.isfile(file_info):
+            filename, value = os.path.basename(file_info), open(file_info, 'rb')
+            opened_files.append(value)
+        elif isinstance(file_info, io.IOBase) or hasattr(file_info, 'read'):
+            filename, value = guess_filename(file_info) or field, file_info
+        elif isinstance(file_info, bytes) or content_as_file:
+            filename, value = field, file_info
+        else:
+            form_data.add_field(field, file_info if isinstance(file_info, string_types)
+                                else str(file_info))
+            return
+
+        form_data.add_field(field, value, filename=filename, content_type=content_type)
+
+    @classmethod
+    def _prepare_auth_arg(cls, sending_kwargs, auth_meta):
+        username, password = auth_meta['username'], auth_meta['password']
+
+        if auth_meta['type'] == 'basic':
+            sending_kwargs['auth'] = aiohttp.BasicAuth(username, password)
+        elif hasattr(aiohttp, 'DigestAuthMiddleware'):
+            sending_kwargs['middlewares'] = (aiohttp.DigestAuthMiddleware(username, password),)
+        else:
+            raise ValueError('digest auth requires aiohttp>=3.12')
+
+    @classmethod
+    def _create_timeout_arg(cls, timeout):
+        if isinstance(timeout, (tuple, list)):
+            connect_timeout, read_timeout = timeout
+            return aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        else:
+            return aiohttp.ClientTimeout(total=timeout)
+
+    @classmethod
+    def _select_proxy(cls, proxies, url):
+        scheme = url.split(':', 1)[0]
+        return proxies.get(scheme) or proxies.get('all')
+
+    @classmethod
+    def _create_ssl_arg(cls, verify, cert):
+        if verify is False:
+            return False
+
+        if not isinstance(verify, string_types) and cert is None:
+            return None
+
+        context = ssl.create_default_context(
+            cafile=verify if isinstance(verify, string_types) else None)
+        if cert is not None:
+            if isinstance(cert, (tuple, list)):
+                context.load_cert_chain(*cert)
+            else:
+                context.load_cert_chain(cert)
+
+        return context
+
+    async def request(self, request_meta):
+        opened_files = []
+        try:
+            sending_kwargs = self._get_sending_kwargs(request_meta, opened_files)
+
+            async with self.session.request(**sending_kwargs) as raw:
+                content = await raw.read()
+        finally:
+            for opened_file in opened_files:
+                opened_file.close()
+
+        return AiohttpResponse(raw, content)
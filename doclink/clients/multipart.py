@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+import uuid
+
+from requests_toolbelt import MultipartEncoder
+from requests_toolbelt.multipart.encoder import total_len
+from six import binary_type, string_types, text_type
+from urllib3.fields import RequestField
+
+
+def _part_body(value):
+    if isinstance(value, tuple):
+        return value[1]
+    else:
+        return value
+
+
+def has_known_length(value):
+    """Whether the size of a field value can be known without reading it."""
+    body = _part_body(value)
+    if isinstance(body, (binary_type, text_type)):
+        return True
+
+    return hasattr(body, 'read') and total_len(body) is not None
+
+
+def _create_request_field(name, value):
+    headers = None
+    if isinstance(value, tuple) and len(value) > 3:
+        headers = value[3]
+        value = value[:3]
+
+    request_field = RequestField.from_tuples(name, value)
+    content_type = value[2] if isinstance(value, tuple) and len(value) > 2 else None
+    request_field.make_multipart(content_type=content_type)
+    if headers:
+        request_field.headers.update(headers)
+
+    return request_field
+
+
+def _iter_body(body, chunk_size):
+    if isinstance(body, text_type):
+        yield body.encode('utf-8')
+    elif isinstance(body, binary_type):
+        yield body
+    elif hasattr(body, 'read'):
+        while True:
+            chunk = body.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk.encode('utf-8') if isinstance(chunk, text_type) else chunk
+    else:
+        for chunk in body:
+            yield chunk.encode('utf-8') if isinstance(chunk, text_type) else chunk
+
+
+def iter_multipart(fields, boundary, chunk_size=65536):
+    """Encode fields as multipart/form-data, chunk by chunk.
+
+    Args:
+        fields (list): (name, value) pairs. Value is a str field, or a tuple
+            of (filename, body[, content_type[, headers]]). Body can be str,
+            bytes, a file object or an iterable of bytes.
+        boundary (bytes): Boundary of the parts.
+    """
+    for name, value in fields:
+        yield b'--' + boundary + b'\r\n'
+        yield _create_request_field(name, value).render_headers().encode('utf-8')
+
+        for chunk in _iter_body(_part_body(value), chunk_size):
+            yield chunk
+
+        yield b'\r\n'
+
+    yield b'--' + boundary + b'--\r\n'
+
+
+def create_multipart_body(fields):
+    """Create a streaming multipart/form-data body of fields.
+
+    If the size of every field is known, the body is a MultipartEncoder,
+    which reads files while sending and has a Content-Length. Otherwise it's
+    a generator, sent with chunked transfer encoding.
+
+    Args:
+        fields (list): (name, value) pairs, see ``iter_multipart``.
+
+    Returns:
+        tuple: The body and its content type.
+    """
+    if all(has_known_length(value) for _, value in fields):
+        encoder = MultipartEncoder(fields)
+        return encoder, encoder.content_type
+
+    boundary = uuid.uuid4().hex
+    content_type = 'multipart/form-data; boundary={}'.format(boundary)
+
+    return iter_multipart(fields, boundary.encode('ascii')), content_type
+
+
+def to_form_fields(data):
+    """Convert a data dict or list of (key, value) pairs to multipart fields,
+    like requests does for files.
+    """
+    if isinstance(data, (binary_type, text_type)):
+        raise ValueError('data sent with files must be a dict or a list of pairs')
+
+    fields = []
+    items = data.items() if isinstance(data, dict) else data
+
+    for name, values in items:
+        if isinstance(values, string_types) or not hasattr(values, '__iter__'):
+            values = [values]
+
+        for value in values:
+            if value is not None:
+                fields.append((name, value if isinstance(value, (binary_type, text_type))
+                               else str(value)))
+
+    return fields
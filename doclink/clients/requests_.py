@@ -2,11 +2,40 @@
 
 import atexit
 import os
+import threading
+import weakref
 
 import requests
-from requests_toolbelt import MultipartEncoder
+from requests.adapters import HTTPAdapter
 from six import string_types
 
+from .. import json_backend
+from ..utils import guess_filename
+from .multipart import create_multipart_body, to_form_fields
+
+# the sessions of alive clients are closed at exit
+_clients = weakref.WeakSet()
+
+
+@atexit.register
+def _close_clients():
+    for client in list(_clients):
+        client.close()
+
+
+class _ThreadSession(object):
+    """Holds the session of a thread, and closes it when the thread exits.
+
+    It's only referenced by the thread local, so it's dropped with the
+    locals of an exited thread.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    def __del__(self):
+        self.session.close()
+
 
 class RequestsClient(object):
 
@@ -15,51 +44,230 @@ class RequestsClient(object):
         'auth', 'timeout', 'allow_redirects', 'proxies',
         'hooks', 'stream', 'verify', 'cert', 'json',
         'multipart')
+    retryable_exceptions = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+    def __init__(self, session=None, pool_connections=None, pool_maxsize=None,
+                 pool_block=None, host_limits=None, thread_local=False):
+        """
+        Args:
+            session (requests.Session): Created if not given.
+            pool_connections (int): Number of hosts to keep connection pools for.
+            pool_maxsize (int): Max connections kept in the pool of a host.
+            pool_block (bool): Block when no free connection in the pool,
+                instead of creating a connection which is discarded after use.
+            host_limits (dict): Map url prefix, such as 'https://api.example.com',
+                to the pool_maxsize of its own adapter, or to a dict of HTTPAdapter kwargs.
+            thread_local (bool): If True, each thread sends requests with its own
+                session, created with the same adapter config. Sessions are closed
+                when their threads exit, or at exit.
+
+        The adapters are mounted only if any pool option is given, otherwise
+        the session keeps requests' defaults.
+        """
+        if session is not None and thread_local:
+            raise ValueError('session can not be shared by threads with thread_local')
+
+        self._adapter_config = (pool_connections, pool_maxsize, pool_block, host_limits)
+        self._sessions = weakref.WeakSet()
+        self._sessions_lock = threading.Lock()
+        _clients.add(self)
+
+        if thread_local:
+            self._thread_local = threading.local()
+            self._session = None
+        else:
+            self._thread_local = None
+            self._session = session or self._create_session()
+            self._mount_adapters(self._session, *self._adapter_config)
+
+    def _create_session(self):
+        session = requests.Session()
+        with self._sessions_lock:
+            self._sessions.add(session)
+
+        return session
+
+    @property
+    def session(self):
+        """The session used by the current thread."""
+        if self._thread_local is None:
+            return self._session
+
+        thread_session = getattr(self._thread_local, 'thread_session', None)
+        if thread_session is None:
+            session = self._create_session()
+            self._mount_adapters(session, *self._adapter_config)
+            thread_session = self._thread_local.thread_session = _ThreadSession(session)
+
+        return thread_session.session
+
+    @property
+    def sessions(self):
+        """All the alive sessions created by this client."""
+        with self._sessions_lock:
+            return list(self._sessions)
+
+    def close(self):
+        """Close all the sessions created by this client."""
+        for session in self.sessions:
+            session.close()
+
+    @staticmethod
+    def _mount_adapters(session, pool_connections, pool_maxsize, pool_block, host_limits):
+        adapter_kwargs = dict(
+            (name, value) for name, value in (
+                ('pool_connections', pool_connections),
+                ('pool_maxsize', pool_maxsize),
+                ('pool_block', pool_block))
+            if value is not None)
+
+        if adapter_kwargs:
+            for prefix in ('https://', 'http://'):
+                session.mount(prefix, HTTPAdapter(**adapter_kwargs))
+
+        for prefix, limit in (host_limits or {}).items():
+            host_adapter_kwargs = dict(adapter_kwargs, pool_connections=1)
+            if isinstance(limit, dict):
+                host_adapter_kwargs.update(limit)
+            else:
+                host_adapter_kwargs['pool_maxsize'] = limit
+
+            session.mount(prefix, HTTPAdapter(**host_adapter_kwargs))
 
-    def __init__(self, session=None):
-        if session is None:
-            session = requests.Session()
-            atexit.register(session.close)
-        self._session = session
+    def pool_stats(self):
+        """Report the usage of connection pools per host.
+
+        Returns:
+            dict: Map 'scheme://host:port' to a dict of pool usage:
+                maxsize: max connections kept in the pool.
+                in_use: connections taken from the pool and not returned yet.
+                idle: connections kept in the pool for reuse.
+                num_connections: connections created by the pool.
+                num_requests: requests sent by the pool.
+        """
+        stats = {}
+        sessions = [self._session] if self._thread_local is None else self.sessions
+        adapters = set(adapter for session in sessions for adapter in session.adapters.values())
+
+        for adapter in adapters:
+            pool_managers = [getattr(adapter, 'poolmanager', None)]
+            pool_managers.extend(getattr(adapter, 'proxy_manager', {}).values())
+
+            for pool_manager in pool_managers:
+                if pool_manager is None:
+                    continue
+
+                for pool_key in pool_manager.pools.keys():
+                    pool = pool_manager.pools.get(pool_key)
+                    if pool is None:
+                        continue
+
+                    host = '{}://{}:{}'.format(pool.scheme, pool.host, pool.port)
+                    host_stats = stats.setdefault(host, dict.fromkeys(
+                        ('maxsize', 'in_use', 'idle', 'num_connections', 'num_requests'), 0))
+                    queue = pool.pool
+                    if queue is not None:
+                        host_stats['maxsize'] += queue.maxsize
+                        host_stats['in_use'] += queue.maxsize - queue.qsize()
+                        host_stats['idle'] += sum(1 for conn in list(queue.queue)
+                                                  if conn is not None)
+                    host_stats['num_connections'] += pool.num_connections
+                    host_stats['num_requests'] += pool.num_requests
+
+        return stats
 
     @classmethod
-    def _prepare_optional_args(cls, sending_kwargs, request_meta):
+    def _prepare_optional_args(cls, sending_kwargs, request_meta, opened_files):
         for arg in cls.optional_args:
             value = request_meta.get(arg)
             if value is not None:
                 if arg == 'auth':
                     sending_kwargs['auth'] = cls._create_auth_arg(value)
                 elif arg == 'files':
-                    files_arg = cls._create_files_arg(value)
+                    files_arg = cls._create_files_arg(value, opened_files)
                     if files_arg:
-                        sending_kwargs['files'] = files_arg
+                        form_fields = sending_kwargs.pop('data', None) or {}
+                        cls._set_multipart_body(
+                            sending_kwargs,
+                            to_form_fields(form_fields) + cls._to_multipart_fields(files_arg))
                 elif arg == 'multipart':
-                    multipart_arg = cls._create_multipart_arg(value)
+                    multipart_arg = cls._create_multipart_arg(value, opened_files)
                     if multipart_arg:
-                        encoder = MultipartEncoder(multipart_arg)
-                        sending_kwargs['data'] = encoder
-                        headers = sending_kwargs.setdefault('headers', {})
-                        headers['Content-Type'] = encoder.content_type
+                        cls._set_multipart_body(
+                            sending_kwargs, cls._to_multipart_fields(multipart_arg, False))
+                elif arg == 'json' and json_backend.get_json_backend() is not None:
+                    # requests ignores json if data is given
+                    if not sending_kwargs.get('data'):
+                        cls._set_json_body(sending_kwargs, value)
                 else:
                     sending_kwargs[arg] = value
 
     @classmethod
-    def _get_sending_kwargs(cls, request_meta):
+    def _get_sending_kwargs(cls, request_meta, opened_files=None):
+        """Create kwargs of session.request from request_meta.
+
+        Args:
+            opened_files (list): Files opened from file paths are appended to it,
+                the caller should close them after sending.
+        """
         sending_kwargs = {}
         sending_kwargs.update(
             method=request_meta['method'],
             url=request_meta.get_url(),
         )
-        cls._prepare_optional_args(sending_kwargs, request_meta)
+        cls._prepare_optional_args(
+            sending_kwargs, request_meta, [] if opened_files is None else opened_files)
 
         return sending_kwargs
 
+    @staticmethod
+    def _to_multipart_fields(files_arg, content_as_file=True):
+        """Convert files arg to multipart fields.
+
+        A value which is not a tuple is sent as a file named by its file name
+        or the field, except str and bytes values if not content_as_file.
+        """
+        fields = []
+
+        for field, file_items in files_arg.items():
+            if not isinstance(file_items, list):
+                file_items = [file_items]
+
+            for file_item in file_items:
+                if isinstance(file_item, tuple):
+                    fields.append((field, file_item))
+                elif not content_as_file and isinstance(file_item, (string_types, bytes)):
+                    fields.append((field, file_item))
+                else:
+                    fields.append((field, (guess_filename(file_item) or field, file_item)))
+
+        return fields
+
+    @staticmethod
+    def _set_multipart_body(sending_kwargs, fields):
+        body, content_type = create_multipart_body(fields)
+        sending_kwargs['data'] = body
+        # headers may be shared with the api's request_meta
+        headers = dict(sending_kwargs.get('headers') or {})
+        headers['Content-Type'] = content_type
+        sending_kwargs['headers'] = headers
+
+    @staticmethod
+    def _set_json_body(sending_kwargs, value):
+        """Encode json arg with the json backend as the body."""
+        sending_kwargs['data'] = json_backend.dumps(value)
+        headers = dict(sending_kwargs.get('headers') or {})
+        if not any(name.lower() == 'content-type' for name in headers):
+            headers['Content-Type'] = 'application/json'
+        sending_kwargs['headers'] = headers
+
     @classmethod
-    def _create_files_arg(cls, files_meta):
+    def _create_files_arg(cls, files_meta, opened_files=None):
         """Create files arg for requests.
 
         Args:
             files_meta (dict): Countain filed name and file_info mapping.
+            opened_files (list): Files opened from file paths are appended to it.
 
         Returns:
             A dict mapping field name to file_item for multipart/form-data
@@ -80,9 +288,13 @@ class RequestsClient(object):
 
             if isinstance(file_info, string_types):
                 try:
-                    return open(file_info, 'rb')  # param is file_path
+                    file_obj = open(file_info, 'rb')  # param is file_path
                 except (IOError, TypeError):
                     pass
+                else:
+                    if opened_files is not None:
+                        opened_files.append(file_obj)
+                    return file_obj
 
             return file_info
 
@@ -104,14 +316,15 @@ class RequestsClient(object):
             return requests.auth.HTTPDigestAuth(auth_meta['username'], auth_meta['password'])
 
     @classmethod
-    def _create_multipart_arg(cls, multipart_meta):
-        """Create a MultipartEncoder instance for multipart/form-data.
+    def _create_multipart_arg(cls, multipart_meta, opened_files=None):
+        """Create multipart arg for multipart/form-data.
 
         Requests_toolbelt will not try to guess file_name. To encode a file we need
         to give file_name explicitly.
 
         Args:
             multipart_meta (dict): Map field name to multipart form-data value.
+            opened_files (list): Files opened from file paths are appended to it.
         """
 
         def create_multipart_item(item_info):
@@ -128,9 +341,13 @@ class RequestsClient(object):
             """
             if isinstance(item_info, string_types):
                 try:
-                    return (os.path.basename(item_info), open(item_info, 'rb'))  # file_path
+                    file_obj = open(item_info, 'rb')  # file_path
                 except (IOError, TypeError):
                     pass
+                else:
+                    if opened_files is not None:
+                        opened_files.append(file_obj)
+                    return (os.path.basename(item_info), file_obj)
 
             try:
                 return (os.path.basename(item_info.name), item_info)  # file_object
@@ -151,5 +368,10 @@ class RequestsClient(object):
         return multipart_arg
 
     def request(self, request_meta):
-        sending_kwargs = self._get_sending_kwargs(request_meta)
-        return self._session.request(**sending_kwargs)
+        opened_files = []
+        try:
+            sending_kwargs = self._get_sending_kwargs(request_meta, opened_files)
+            return self.session.request(**sending_kwargs)
+        finally:
+            for opened_file in opened_files:
+                opened_file.close()
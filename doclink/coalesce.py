@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+import copy
+import sys
+import threading
+
+import six
+
+
+def _freeze(value):
+    """Convert value to a hashable key, raise TypeError if it's not possible."""
+    if isinstance(value, dict):
+        return tuple(sorted(((k, _freeze(v)) for k, v in value.items()), key=repr))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+
+    hash(value)
+    return value
+
+
+class _Call(object):
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.resp = None
+        self.exc_info = None
+        self.waiters = 0
+
+
+class SingleFlight(object):
+    """Coalesce concurrent identical requests into one in-flight request.
+
+    Requests are identical if their final request_meta are equal. The caller
+    which sends the request shares a copy of its response with the callers
+    waiting for it, and each caller handles the response with the resp hooks.
+    An exception raised by the request is raised to all of them.
+
+    Args:
+        methods (list[str]): Http methods which can be coalesced.
+
+    Attributes:
+        shared (int): Number of requests served by another caller's request.
+    """
+
+    def __init__(self, methods=('get', 'head')):
+        self.methods = frozenset(method.lower() for method in methods)
+        self.shared = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_meta(cls, coalesce_meta):
+        """Create from the coalesce item of api meta, a dict of kwargs or a bool."""
+        if isinstance(coalesce_meta, dict):
+            return cls(**coalesce_meta)
+        elif coalesce_meta:
+            return cls()
+        else:
+            return None
+
+    def key(self, request_meta):
+        if request_meta['method'].lower() not in self.methods or request_meta.get('stream'):
+            return None
+
+        try:
+            return _freeze(request_meta)
+        except TypeError:
+            return None
+
+    def request(self, request_meta, send):
+        """Send request_meta, or wait for the identical request in flight.
+
+        Args:
+            request_meta (RequestMeta): Request to send.
+            send (callable): Send request_meta and return the response.
+        """
+        key = self.key(request_meta)
+        if key is None:
+            return send(request_meta)
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if leader:
+            return self._lead(key, call, request_meta, send)
+
+        call.event.wait()
+
+        if call.exc_info is not None:
+            six.reraise(*call.exc_info)
+
+        with self._lock:
+            self.shared += 1
+
+        return copy.copy(call.resp)
+
+    def _lead(self, key, call, request_meta, send):
+        try:
+            resp = send(request_meta)
+            # share a copy, the attrs set by resp hooks of this caller are not shared
+            call.resp = copy.copy(resp)
+            return resp
+        except BaseException:
+            call.exc_info = sys.exc_info()
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
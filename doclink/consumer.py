@@ -2,7 +2,14 @@
 
 from functools import partial
 
-from .builder import build_api
+from six import string_types
+
+from .builder import build_api, LazyApi
+from .bulk import map_calls
+from .breaker import CircuitBreaker
+from .coalesce import SingleFlight
+from .metrics import Metrics
+from .retry import RetryBudget, RetryPolicy
 from .request_meta import RequestMetaContainer
 from .utils import methods
 from .clients import DefaultClient
@@ -20,18 +27,49 @@ class Consumer(RequestMetaContainer):
         resp_hooks (list[callable]): Consumer level resp_hooks(resp middleware)
         client: Client to send http request.
         expected_status_code (integer): The default expected status_code.
+        client_kwargs (dict): Kwargs to create the DefaultClient if client is not
+            given, such as the pool options of RequestsClient.
+        coalesce (bool): If True, concurrent identical GET/HEAD calls of the apis
+            share one in-flight request. Apis can override it with the
+            ``coalesce`` item of api meta.
+        retry (dict): Default RetryPolicy kwargs of the apis, overridden by
+            the ``retry`` item of api meta.
+        retry_budget (RetryBudget): Budget shared by the retries of all the apis.
+        circuit_breaker (dict or CircuitBreaker): CircuitBreaker kwargs, or an
+            instance to share between consumers. Calls of the apis go through
+            the circuit of their base_uri, so each route has its own circuit.
+        metrics (bool or Metrics): If set, the phases of each api call are
+            timed, set as ``resp.timings`` and aggregated per api by
+            ``self.metrics``. An api can set its own ``metrics``, or None.
+        lazy (bool): If True, the pydoc meta of an api is parsed on its first
+            call or attr access instead of at declaration. Use ``warmup`` to
+            build all of them up front.
     """
 
+    # routes of more route_keys clear the route cache
+    max_cached_routes = 1024
+
     def __init__(self, base_uri='http://localhost',
-                 expected_status_code=None, client=None, **meta_kwargs):
+                 expected_status_code=None, client=None, client_kwargs=None,
+                 coalesce=False, retry=None, retry_budget=None, circuit_breaker=None,
+                 metrics=None, lazy=False, **meta_kwargs):
         super(Consumer, self).__init__()
         self.base_uri = base_uri
         self.initialize_request_meta(base_uri=base_uri, **meta_kwargs)
         self.apis = {}
         self.resp_hooks = [self._check_status]
-        self.client = client or DefaultClient()
+        self.client = client or DefaultClient(**(client_kwargs or {}))
         self._router = None
+        self._routes = {}
+        self._routes_by_uri = {}
         self.expected_status_code = expected_status_code
+        self.singleflight = SingleFlight() if coalesce else None
+        self.retry_budget = retry_budget or RetryBudget()
+        self.retry_policy = RetryPolicy.from_meta(retry, budget=self.retry_budget)
+        self.circuit_breaker = CircuitBreaker.from_meta(circuit_breaker)
+        self.metrics = Metrics.from_meta(metrics)
+        self.middlewares = []
+        self.lazy = lazy
 
     @staticmethod
     def _check_status(resp):
@@ -62,15 +100,50 @@ class Consumer(RequestMetaContainer):
 
         def deco(func):
             name = func.__name__
-            api = build_api(self, http_method, uri, func, arg_validators, on_request)
+            api = build_api(self, http_method, uri, func, arg_validators, on_request,
+                            lazy=self.lazy)
 
             self.apis[name] = api
+            self.clear_routes()
 
             return api
         return deco
 
+    def warmup(self):
+        """Build all the lazy apis now."""
+        for api in self.apis.values():
+            if isinstance(api, LazyApi):
+                api.build()
+
+    def gather(self, calls, concurrency=10, ordered=True, return_exceptions=False):
+        """Run api calls on a bounded thread pool sharing this consumer's client.
+
+        Args:
+            calls (iterable): (api, kwargs) pairs. Api can be an api name,
+                an Api or its partial.
+
+        See ``doclink.bulk.map_calls`` for other args.
+        """
+        return map_calls(((self.apis[api] if isinstance(api, string_types) else api, kwargs)
+                          for api, kwargs in calls),
+                         concurrency, ordered, return_exceptions)
+
+    def use(self, middleware):
+        """Add a middleware of all the apis, see ``doclink.middleware.Middleware``."""
+        self.middlewares.append(middleware)
+        return middleware
+
     def resp_hook(self, func):
+        """Decorator to add a resp hook of all the apis.
+
+        The compiled resp hooks of the apis are reset, so hooks should be
+        added with it instead of appending to ``resp_hooks``.
+        """
         self.resp_hooks.append(func)
+
+        for api in self.apis.values():
+            api._resp_pipeline = None
+
         return func
 
     @property
@@ -83,17 +156,54 @@ class Consumer(RequestMetaContainer):
     @router.setter
     def router(self, router):
         self._router = router
+        self.clear_routes()
+
+    def clear_routes(self):
+        """Clear cached routes, call it after changing the router in place."""
+        self._routes = {}
+        self._routes_by_uri = {}
 
     def routing(self, route_key):
         """Get route of selected base_uri from router based on route_key.
 
+        Routes are cached per route_key if the router is a dict, or has a
+        true ``cacheable_routes`` attr, so a router selecting base_uri
+        dynamically isn't cached. Routes of the same base_uri are shared.
+
         Args:
             route_key: Used to select base_uri.
 
         Returns:
             Route: The route holds selected base_uri.
         """
-        return Route(self, base_uri=self.get_routed_uri(route_key))
+        try:
+            route = self._routes.get(route_key)
+        except TypeError:  # unhashable route_key
+            return self._get_route(self.get_routed_uri(route_key))
+
+        if route is None:
+            route = self._get_route(self.get_routed_uri(route_key))
+
+            if self._cacheable_routes():
+                if len(self._routes) >= self.max_cached_routes:
+                    self._routes.clear()
+                self._routes[route_key] = route
+
+        return route
+
+    def _cacheable_routes(self):
+        router = self.router
+        return router is None or type(router) is dict or \
+            getattr(router, 'cacheable_routes', False)
+
+    def _get_route(self, base_uri):
+        route = self._routes_by_uri.get(base_uri)
+        if route is None:
+            if len(self._routes_by_uri) >= self.max_cached_routes:
+                self._routes_by_uri.clear()
+            route = self._routes_by_uri[base_uri] = Route(self, base_uri)
+
+        return route
 
     def get_routed_uri(self, route_key):
         """Select uri based on route_key.
@@ -122,11 +232,29 @@ class Consumer(RequestMetaContainer):
 
 
 class Route(object):
+    """Apis bound to a base_uri.
+
+    The bound api partials are cached, so accessing an api of a route
+    costs as much as accessing a plain attr.
+    """
 
     def __init__(self, consumer, base_uri):
         self.consumer = consumer
         self.base_uri = base_uri
+        self._bound = {}
+
+    def bind(self, api):
+        bound = self._bound.get(api)
+        if bound is None:
+            bound = self._bound[api] = api.partial(base_uri=self.base_uri)
+
+        return bound
 
     def __getattr__(self, name):
-        api = self.consumer.apis[name]
-        return api.partial(base_uri=self.base_uri)
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        bound = self.bind(self.consumer.apis[name])
+        setattr(self, name, bound)
+
+        return bound
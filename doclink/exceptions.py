@@ -35,3 +35,11 @@ class InvalidApimetaItemError(DoclinkError):
     def __init__(self, event, msg=None):
         msg = msg or 'Invalid Apimeta item:{}'.format(event)
         super(InvalidApimetaItemError, self).__init__(msg)
+
+
+class CircuitOpenError(DoclinkError):
+    def __init__(self, base_uri, retry_after, msg=None):
+        self.base_uri = base_uri
+        self.retry_after = retry_after
+        msg = msg or 'circuit open: {}, retry after {:.1f}s'.format(base_uri, retry_after)
+        super(CircuitOpenError, self).__init__(msg)
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""Pluggable json backend to decode response bodies and encode json args.
+
+No backend is set by default: responses are decoded by their own json
+method and json args are encoded by the client, as without doclink. A
+faster module such as orjson is opted in with ``set_json_backend``.
+"""
+
+import codecs
+import importlib
+import json
+import weakref
+
+from six import binary_type, string_types, text_type
+
+BACKENDS = ('orjson', 'ujson', 'json')
+
+_UTF8_ENCODINGS = ('utf-8', 'utf8')
+
+
+def _stdlib_dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class JsonBackend(object):
+    """Loads and dumps json with one of the json modules.
+
+    Objects orjson or ujson can't dump, such as Decimal values or ints
+    larger than 64 bits, are dumped by the stdlib json instead.
+
+    Args:
+        name (str): 'orjson', 'ujson' or 'json'. ImportError is raised if
+            its module isn't installed.
+    """
+
+    def __init__(self, name):
+        if name not in BACKENDS:
+            raise ValueError('json backend should be one of {}'.format(BACKENDS))
+
+        self.name = name
+        self.module = importlib.import_module(name)
+
+    def loads(self, content):
+        """Load json from str, or bytes encoded in utf-8."""
+        if self.name == 'json' and isinstance(content, binary_type):
+            # the stdlib json only loads bytes since python 3.6
+            content = content.decode('utf-8')
+
+        return self.module.loads(content)
+
+    def dumps(self, obj):
+        """Dump obj as json bytes encoded in utf-8."""
+        try:
+            if self.name == 'orjson':
+                return self.module.dumps(obj, option=self.module.OPT_NON_STR_KEYS)
+            elif self.name == 'ujson':
+                content = self.module.dumps(obj, ensure_ascii=False)
+                return content.encode('utf-8') if isinstance(content, text_type) else content
+        except (TypeError, OverflowError):
+            pass
+
+        return _stdlib_dumps(obj)
+
+
+_backend = None
+
+
+def get_json_backend():
+    """Get the json backend, None if not set."""
+    return _backend
+
+
+def set_json_backend(backend):
+    """Set the json backend used by doclink.
+
+    Args:
+        backend: A backend name of ``BACKENDS``, or an object with ``loads``
+            and ``dumps`` methods, where dumps returns bytes. None unsets it.
+    """
+    global _backend
+
+    if isinstance(backend, string_types):
+        backend = JsonBackend(backend)
+    elif backend is not None and not (callable(getattr(backend, 'loads', None)) and
+                                      callable(getattr(backend, 'dumps', None))):
+        raise ValueError('json backend should have loads and dumps methods')
+
+    _backend = backend
+
+
+def loads(content):
+    """Load json with the json backend, or the stdlib json if not set."""
+    if _backend is None:
+        if isinstance(content, binary_type):
+            content = content.decode('utf-8')
+        return json.loads(content)
+
+    return _backend.loads(content)
+
+
+def dumps(obj):
+    """Dump obj as utf-8 json bytes with the json backend, or the stdlib json if not set."""
+    if _backend is None:
+        return _stdlib_dumps(obj)
+
+    return _backend.dumps(obj)
+
+
+def decode_json(resp):
+    """Decode the json body of resp with the json backend.
+
+    Bodies in utf-8 are decoded from bytes directly, others from ``resp.text``.
+    The json method of resp is used if no backend is set, the encoding is
+    unknown and the body may be utf-16 or utf-32, or resp has no bytes
+    content. It's also used if the backend fails, so the errors are raised
+    as the exceptions of resp, such as ``requests.exceptions.JSONDecodeError``.
+    """
+    content = getattr(resp, 'content', None)
+    if _backend is None or not isinstance(content, binary_type):
+        return type(resp).json(resp)
+
+    encoding = getattr(resp, 'encoding', None)
+
+    if encoding is None:
+        if b'\x00' in content[:4]:
+            return type(resp).json(resp)
+    elif encoding.lower() not in _UTF8_ENCODINGS:
+        content = resp.text
+
+    if isinstance(content, binary_type) and content.startswith(codecs.BOM_UTF8):
+        content = content[len(codecs.BOM_UTF8):]
+
+    try:
+        return _backend.loads(content)
+    except ValueError:
+        return type(resp).json(resp)
+
+
+class MemoizedJson(object):
+    """json method of a resp, memoizing the decoded body.
+
+    The body is decoded once, however many resp hooks call ``resp.json()``,
+    so they share the decoded object. Calls with kwargs are passed to the
+    original json method and not memoized.
+    """
+
+    _missing = object()
+
+    def __init__(self, resp):
+        # a weak ref avoids the ref cycle keeping large bodies alive until gc
+        self._resp_ref = weakref.ref(resp)
+        self._value = self._missing
+
+    def __call__(self, **kwargs):
+        resp = self._resp_ref()
+
+        if kwargs:
+            return type(resp).json(resp, **kwargs)
+
+        if self._value is self._missing:
+            self._value = decode_json(resp)
+
+        return self._value
+
+
+def memoize_json(resp):
+    """Replace the json method of resp with a MemoizedJson."""
+    if hasattr(type(resp), 'json'):
+        try:
+            resp.json = MemoizedJson(resp)
+        except (AttributeError, TypeError):  # slots or not weak referable
+            pass
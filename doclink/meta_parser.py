@@ -1,14 +1,25 @@
 # -*- coding: utf-8 -*-
 
 from functools import partial
+import hashlib
+import json
+import os
 import re
+import tempfile
 
 import yaml
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+from .__version__ import __version__
 from .exceptions import (
     ApimetaNotFoundError,
     MetaParserUnknownError,
     InvalidApimetaItemError)
+from .utils import ArgNormalizer, RawArg
 
 
 class ParseObserver(object):
@@ -24,7 +35,12 @@ class ParseObserver(object):
             arg_group=cls._on_arg_group,
             base_uri=cls._on_base_uri,
             timeout=cls._on_timeout,
-            expected_status_code=cls._on_expected_status_code)
+            expected_status_code=cls._on_expected_status_code,
+            cache=cls._on_cache,
+            coalesce=cls._on_coalesce,
+            retry=cls._on_retry,
+            stream=cls._on_stream,
+            chunked_upload=cls._on_chunked_upload)
 
     def trigger_event(self, event_name, *args, **kwargs):
         try:
@@ -46,6 +62,21 @@ class ParseObserver(object):
     def _on_expected_status_code(self, value):
         self._builder.build_expected_status_code(value)
 
+    def _on_cache(self, value):
+        self._builder.build_cache(value)
+
+    def _on_coalesce(self, value):
+        self._builder.build_coalesce(value)
+
+    def _on_retry(self, value):
+        self._builder.build_retry(value)
+
+    def _on_stream(self, value):
+        self._builder.build_stream(value)
+
+    def _on_chunked_upload(self, value):
+        self._builder.build_chunked_upload(value)
+
     def set_builder(self, builder):
         self._builder = builder
 
@@ -53,10 +84,136 @@ class ParseObserver(object):
 ParseObserver.map_event_handle()
 
 
+class EventRecorder(object):
+    """Observer wrapper which records the events triggered by a parser.
+
+    The raw args of arg_group events are normalized with ArgNormalizer before
+    passing to the wrapped observer, so the recorded events are normalized meta.
+    """
+
+    def __init__(self, observer):
+        self.observer = observer
+        self.events = []
+
+    def trigger_event(self, event_name, *args):
+        if event_name == 'arg_group':
+            group_name, raw_args = args
+            args = (group_name, list(ArgNormalizer.normalize(raw_args).values()))
+
+        self.events.append((event_name,) + tuple(args))
+        self.observer.trigger_event(event_name, *args)
+
+    def set_builder(self, builder):
+        self.observer.set_builder(builder)
+
+
+class MetaCache(object):
+    """On-disk cache of normalized api meta.
+
+    The events parsed from a meta doc are stored as a json file, keyed by a hash
+    of the meta doc, its format and the doclink version.
+    Meta which can't be serialized as json is not cached.
+
+    Args:
+        cache_dir (str): The dir to store cache files, created if not exists.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    @staticmethod
+    def key(format_, meta_doc):
+        raw_key = '\0'.join((__version__, format_, meta_doc))
+        return hashlib.sha1(raw_key.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.json')
+
+    @staticmethod
+    def _dump_event(event):
+        if event[0] == 'arg_group':
+            event_name, group_name, raw_args = event
+            return [event_name, group_name, [list(raw_arg) for raw_arg in raw_args]]
+        return list(event)
+
+    @staticmethod
+    def _load_event(event):
+        if event[0] == 'arg_group':
+            event_name, group_name, raw_args = event
+            return (event_name, group_name, [RawArg(*raw_arg) for raw_arg in raw_args])
+        return tuple(event)
+
+    def get(self, key):
+        try:
+            with open(self._path(key)) as f:
+                events = json.load(f)
+            return [self._load_event(event) for event in events]
+        except (IOError, OSError, ValueError, TypeError):
+            return None
+
+    def set(self, key, events):
+        dumped = [self._dump_event(event) for event in events]
+        try:
+            content = json.dumps(dumped, separators=(',', ':'))
+        except (TypeError, ValueError):
+            return
+
+        # e.g. tuples or non-str dict keys are changed by json
+        if json.loads(content) != dumped:
+            return
+
+        try:
+            if not os.path.isdir(self.cache_dir):
+                os.makedirs(self.cache_dir)
+
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir)
+            with os.fdopen(fd, 'w') as f:
+                f.write(content)
+            getattr(os, 'replace', os.rename)(tmp_path, self._path(key))
+        except (IOError, OSError):
+            pass
+
+
+class CachedParser(object):
+    """Parser which replays the cached events of its meta doc.
+
+    On cache miss, the meta doc is parsed by the wrapped parser and the
+    normalized events are stored in the MetaCache.
+    """
+
+    def __init__(self, parser, format_, meta_cache):
+        self.parser = parser
+        self.format = format_
+        self.meta_cache = meta_cache
+
+    def set_builder(self, builder):
+        self.parser.set_builder(builder)
+
+    def parse(self):
+        observer = self.parser.observer
+        key = self.meta_cache.key(self.format, self.parser.meta_doc)
+        events = self.meta_cache.get(key)
+
+        if events is not None:
+            for event in events:
+                observer.trigger_event(*event)
+            return
+
+        recorder = EventRecorder(observer)
+        self.parser.observer = recorder
+        try:
+            self.parser.parse()
+        finally:
+            self.parser.observer = observer
+
+        self.meta_cache.set(key, recorder.events)
+
+
 class ParserFactory(object):
     meta_pattern = re.compile(r'\<meta(?:\:(?P<format>\w+))?\>(?P<meta>.+)\</meta\>',
                               re.DOTALL)
     _parser_map = {}
+    meta_cache = None
 
     @classmethod
     def register_parser(cls, parser_or_name):
@@ -98,8 +255,17 @@ class ParserFactory(object):
             parser_cls = cls._parser_map[format_]
         except KeyError:
             raise MetaParserUnknownError(format_)
+
+        parser = parser_cls(meta_doc, observer)
+        if cls.meta_cache is not None:
+            return CachedParser(parser, format_, cls.meta_cache)
         else:
-            return parser_cls(meta_doc, observer)
+            return parser
+
+    @classmethod
+    def set_cache_dir(cls, cache_dir):
+        """Set the dir of the on-disk meta cache, None to disable it."""
+        cls.meta_cache = MetaCache(cache_dir) if cache_dir else None
 
 
 class ParserBase(object):
@@ -117,15 +283,31 @@ class ParserBase(object):
 
 @ParserFactory.register_parser('yaml')
 class YamlParser(ParserBase):
+    """Parser of yaml meta doc.
+
+    Meta docs are loaded with the libyaml based CSafeLoader if available.
+    The loaded dict is memoized on the exact meta doc, since identical meta
+    is common across apis. It's shared by the parsers and must not be changed.
+    """
+
     arg_field_map = {
         'query': 'params',
         'form': 'data',
         'header': 'headers',
         'file': 'files'
     }
+    _meta_dict_memo = {}
+
+    @classmethod
+    def load(cls, meta_doc):
+        try:
+            return cls._meta_dict_memo[meta_doc]
+        except KeyError:
+            meta_dict = cls._meta_dict_memo[meta_doc] = yaml.load(meta_doc, Loader=SafeLoader)
+            return meta_dict
 
     def parse(self):
-        meta_dict = yaml.load(self.meta_doc)
+        meta_dict = self.load(self.meta_doc)
         for item_name, item_value in meta_dict.items():
             if item_name == 'args':
                 item_value = {item_value: None} if isinstance(item_value, str) else item_value
@@ -138,3 +320,10 @@ class YamlParser(ParserBase):
 
 def creat_parser(pydoc, observer=None):
     return ParserFactory.create(pydoc, observer)
+
+
+def set_cache_dir(cache_dir):
+    ParserFactory.set_cache_dir(cache_dir)
+
+
+set_cache_dir(os.environ.get('DOCLINK_META_CACHE_DIR'))
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+
+from collections import deque
+
+_clock = getattr(time, 'monotonic', time.time)
+
+PHASES = ('args', 'url', 'send', 'hooks', 'handler', 'total')
+
+
+class PhaseTimer(object):
+    """Time the phases of an api call.
+
+    Phases:
+        args: processing the args and on_request.
+        url: expanding the url.
+        send: sending the request and receiving the response, with retries.
+        hooks: the resp hooks.
+        handler: the api func.
+        total: the whole call.
+
+    Attributes:
+        timings (dict): Map phase to seconds, set as ``resp.timings``.
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self._start = self._last = _clock()
+
+    def lap(self, phase):
+        now = _clock()
+        self.timings[phase] = now - self._last
+        self._last = now
+
+    def stop(self):
+        self.timings['total'] = _clock() - self._start
+
+
+class Histogram(object):
+    """Latencies of the latest calls, to estimate percentiles.
+
+    Args:
+        window (int): Number of the latest latencies kept.
+    """
+
+    def __init__(self, window=1024):
+        self.count = 0
+        self.sum = 0.0
+        self._samples = deque(maxlen=window)
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self._samples.append(value)
+
+    @staticmethod
+    def _percentile(samples, percent):
+        if not samples:
+            return None
+
+        return samples[int(round(percent / 100.0 * (len(samples) - 1)))]
+
+    def percentile(self, percent):
+        return self._percentile(sorted(self._samples), percent)
+
+    def summary(self):
+        samples = sorted(self._samples)
+
+        return {'count': self.count, 'sum': self.sum,
+                'p50': self._percentile(samples, 50),
+                'p95': self._percentile(samples, 95),
+                'p99': self._percentile(samples, 99)}
+
+
+class Exporter(object):
+    """Interface to export the timings of each api call to a collector."""
+
+    def export(self, api_name, timings, error):
+        """Export the timings of a call.
+
+        Args:
+            api_name (str): Name of the api.
+            timings (dict): Map phase to seconds.
+            error (bool): Whether the call raised.
+        """
+        raise NotImplementedError
+
+
+class StatsdExporter(Exporter):
+    """Export to a statsd-style client, with ``timing`` and ``incr`` methods.
+
+    Timings are sent in milliseconds as ``<prefix>.<api_name>.<phase>``.
+    """
+
+    def __init__(self, client, prefix='doclink'):
+        self.client = client
+        self.prefix = prefix
+
+    def export(self, api_name, timings, error):
+        name = '{}.{}'.format(self.prefix, api_name)
+
+        for phase, seconds in timings.items():
+            self.client.timing('{}.{}'.format(name, phase), seconds * 1000)
+
+        self.client.incr('{}.{}'.format(name, 'errors' if error else 'calls'))
+
+
+class PrometheusExporter(Exporter):
+    """Export to prometheus-style metrics.
+
+    Args:
+        histogram: Histogram with labels api and phase, observed in seconds.
+        errors: Counter with label api, counting the calls which raised.
+    """
+
+    def __init__(self, histogram, errors=None):
+        self.histogram = histogram
+        self.errors = errors
+
+    def export(self, api_name, timings, error):
+        for phase, seconds in timings.items():
+            self.histogram.labels(api=api_name, phase=phase).observe(seconds)
+
+        if error and self.errors is not None:
+            self.errors.labels(api=api_name).inc()
+
+
+class _ApiStats(object):
+
+    def __init__(self, window):
+        self.count = 0
+        self.errors = 0
+        self.phases = dict((phase, Histogram(window)) for phase in PHASES)
+
+
+class Metrics(object):
+    """Aggregate the phase timings of api calls per api.
+
+    Args:
+        exporters (list[Exporter]): Exporters of the timings of each call.
+        window (int): Number of the latest calls kept for percentiles.
+    """
+
+    def __init__(self, exporters=(), window=1024):
+        self.exporters = list(exporters)
+        self.window = window
+        self._apis = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_meta(cls, metrics_meta):
+        """Create from a dict of kwargs or a bool, or return the Metrics as is."""
+        if isinstance(metrics_meta, Metrics):
+            return metrics_meta
+        elif isinstance(metrics_meta, dict):
+            return cls(**metrics_meta)
+        elif metrics_meta:
+            return cls()
+        else:
+            return None
+
+    def add_exporter(self, exporter):
+        self.exporters.append(exporter)
+
+    def record(self, api_name, timings, error=False):
+        with self._lock:
+            stats = self._apis.get(api_name)
+            if stats is None:
+                stats = self._apis[api_name] = _ApiStats(self.window)
+
+            stats.count += 1
+            if error:
+                stats.errors += 1
+
+            for phase, seconds in timings.items():
+                stats.phases[phase].observe(seconds)
+
+        for exporter in self.exporters:
+            exporter.export(api_name, timings, error)
+
+    def stats(self):
+        """Map api name to its count, errors and a summary of each phase.
+
+        A phase summary has count, sum, p50, p95 and p99 in seconds.
+        """
+        with self._lock:
+            return dict(
+                (api_name, {'count': stats.count, 'errors': stats.errors,
+                            'phases': dict((phase, histogram.summary())
+                                           for phase, histogram in stats.phases.items()
+                                           if histogram.count)})
+                for api_name, stats in self._apis.items())
+
+    def reset(self):
+        with self._lock:
+            self._apis = {}
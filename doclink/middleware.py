@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import time
+
+import six
+
+_clock = getattr(time, 'monotonic', time.time)
+
+
+class CallContext(object):
+    """State of an api call, passed to the hooks of middlewares.
+
+    Middlewares can set their own attrs on it to keep state between hooks.
+
+    Attributes:
+        api (Api): The called api.
+        kwargs (dict): Input kwargs of the call.
+        middlewares (list[Middleware]): Middlewares of the consumer and the api.
+        request_meta (RequestMeta): Request of the current attempt, None
+            before the first send.
+        attempt (int): Number of the current send attempt, starts from 1.
+            Retries send the request again.
+        resp: Response of the current attempt.
+        result: Result of the call.
+        exception (Exception): Exception raised by the call.
+        start (float): Monotonic clock when the call started.
+        attempt_start (float): Monotonic clock when the current attempt started.
+        timings (dict): Phase timings if the api has metrics, else None.
+    """
+
+    def __init__(self, api, kwargs, middlewares, timings=None):
+        self.api = api
+        self.kwargs = kwargs
+        self.middlewares = middlewares
+        self.request_meta = None
+        self.attempt = 0
+        self.resp = None
+        self.result = None
+        self.exception = None
+        self.start = self.attempt_start = _clock()
+        self.timings = timings
+
+    @property
+    def elapsed(self):
+        """Seconds since the call started."""
+        return _clock() - self.start
+
+
+class Middleware(object):
+    """Base of middlewares, the hooks do nothing by default.
+
+    The ``before_*`` hooks of middlewares run in order, and the others run
+    in reverse order, so the first middleware wraps the others.
+    """
+
+    def before_build(self, ctx):
+        """Before the kwargs are processed, ``ctx.kwargs`` can be changed."""
+
+    def before_send(self, ctx):
+        """Before each attempt to send ``ctx.request_meta``, which can be changed.
+
+        Setting ``ctx.resp`` skips sending, like a cache hit.
+        """
+
+    def after_send(self, ctx):
+        """After each attempt got ``ctx.resp``, which can be replaced."""
+
+    def on_error(self, ctx):
+        """After the call raised ``ctx.exception``.
+
+        Setting ``ctx.exception`` to None returns ``ctx.result`` instead.
+        """
+
+    def after_handle(self, ctx):
+        """After the resp hooks and api func returned ``ctx.result``, which can be replaced."""
+
+
+def run_before_send(request_meta, ctx):
+    """Start an attempt of the call and run the before_send hooks."""
+    ctx.attempt += 1
+    ctx.attempt_start = _clock()
+    # middlewares may write the nested fields of request_meta
+    request_meta.own_fields()
+    ctx.request_meta = request_meta
+    ctx.resp = None
+
+    for middleware in ctx.middlewares:
+        middleware.before_send(ctx)
+
+
+def run_after_send(ctx):
+    for middleware in reversed(ctx.middlewares):
+        middleware.after_send(ctx)
+
+    return ctx.resp
+
+
+def run_after_handle(ctx):
+    """Run the after_handle hooks and return the result.
+
+    If an ``after_handle`` raises, that middleware and the ones which have
+    not run ``after_handle`` yet get ``on_error`` instead.
+    """
+    middlewares = ctx.middlewares
+
+    for index in range(len(middlewares) - 1, -1, -1):
+        try:
+            middlewares[index].after_handle(ctx)
+        except Exception:
+            return run_on_error(ctx, sys.exc_info(), middlewares[:index + 1])
+
+    return ctx.result
+
+
+def run_on_error(ctx, exc_info, middlewares):
+    """Run the on_error hooks of middlewares for exc_info, raised by the call.
+
+    An exception raised by ``on_error`` replaces ``ctx.exception`` for the
+    rest of them. Returns ``ctx.result`` if ``ctx.exception`` is set to None.
+    """
+    e = ctx.exception = exc_info[1]
+
+    for middleware in reversed(middlewares):
+        try:
+            middleware.on_error(ctx)
+        except Exception as error:
+            exc_info = sys.exc_info()
+            e = ctx.exception = error
+
+    if ctx.exception is e:
+        six.reraise(*exc_info)
+    elif ctx.exception is not None:
+        raise ctx.exception
+
+    return ctx.result
+
+
+def send_with_middlewares(request_meta, send, ctx):
+    """Send an attempt of the call through the send hooks of middlewares."""
+    run_before_send(request_meta, ctx)
+
+    if ctx.resp is None:
+        ctx.resp = send(ctx.request_meta)
+
+    return run_after_send(ctx)
+
+
+def call_with_middlewares(call, ctx):
+    """Run call(ctx) through the build, error and handle hooks of middlewares.
+
+    Each middleware gets either ``after_handle`` or ``on_error``.
+    """
+    try:
+        for middleware in ctx.middlewares:
+            middleware.before_build(ctx)
+
+        ctx.result = call(ctx)
+    except Exception:
+        return run_on_error(ctx, sys.exc_info(), ctx.middlewares)
+
+    return run_after_handle(ctx)
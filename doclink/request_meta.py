@@ -2,28 +2,73 @@
 
 import copy
 
-import uritemplate
+from .utils import compile_uri_template
 
 
 class RequestMeta(dict):
     """传入session作为发送request参数来源
 
     每一个api实例有一个requestmeta作为享元
-    调用api时，生成一个deepcopy供api构造参数
+    调用api时，生成一个写时复制(copy-on-write)的副本供api构造参数：
+    副本与享元共享嵌套的字段(如params, headers)，只有在通过
+    ``field_for_update`` 写入某个字段时才复制该字段。
     """
 
+    def __init__(self, *args, **kwargs):
+        super(RequestMeta, self).__init__(*args, **kwargs)
+        self._owned_fields = set()
+
     @property
     def copy(self):
+        """Copy-on-write copy of this meta.
+
+        Top level items are copied, nested field dicts are shared with this meta
+        until they are fetched with ``field_for_update``.
+        """
+        return RequestMeta(self)
+
+    def deepcopy(self):
         return copy.deepcopy(self)
 
+    def field_for_update(self, name):
+        """Get a nested field dict which is safe to write.
+
+        The field is copied the first time it's fetched from a copy-on-write meta,
+        and created if it does not exist.
+
+        Args:
+            name (str): Field name, such as 'params' or 'headers'.
+
+        Returns:
+            dict: The field owned by this meta.
+        """
+        field = self.get(name)
+
+        if field is None or name not in self._owned_fields:
+            field = dict(field) if field else {}
+            self[name] = field
+            self._owned_fields.add(name)
+
+        return field
+
+    def own_fields(self):
+        """Copy all the nested fields not owned yet.
+
+        Called before user code such as on_request gets a copy-on-write meta,
+        so writing its nested fields doesn't change the meta copied from.
+        """
+        for name, field in list(self.items()):
+            if name not in self._owned_fields and isinstance(field, (dict, list)):
+                self[name] = copy.copy(field)
+                self._owned_fields.add(name)
+
     def get_url(self):
         path_args = self.get('path')
-        uri_template = self['base_uri'] + self['uri']
 
         if path_args:
-            return uritemplate.expand(uri_template, path_args)
+            return compile_uri_template(self['uri'], self['base_uri']).expand(path_args)
         else:
-            return uri_template
+            return self['base_uri'] + self['uri']
 
 
 class RequestMetaContainer(object):
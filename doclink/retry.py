@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+
+import random
+import threading
+import time
+
+from email.utils import parsedate_tz, mktime_tz
+
+from six import binary_type, string_types
+
+
+def parse_retry_after(value):
+    """Parse Retry-After header, in seconds or an http date, to seconds."""
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    parsed = parsedate_tz(value)
+    if parsed is None:
+        return None
+
+    return max(0.0, mktime_tz(parsed) - time.time())
+
+
+def _iter_body_values(request_meta):
+    for name in ('data', 'files', 'multipart'):
+        values = [request_meta.get(name)]
+
+        while values:
+            value = values.pop()
+            if isinstance(value, dict):
+                values.extend(value.values())
+            elif isinstance(value, (list, tuple)):
+                values.extend(value)
+            elif value is not None:
+                yield value
+
+
+def get_body_positions(request_meta):
+    """Get the positions of file objects in the body of request_meta.
+
+    Returns:
+        list: (file object, position) pairs to rewind the body before a
+            retry, or None if the body has streams which can't be rewound,
+            such as generators.
+    """
+    positions = []
+
+    for value in _iter_body_values(request_meta):
+        if isinstance(value, (string_types, binary_type)):
+            continue
+
+        if hasattr(value, 'read'):
+            try:
+                positions.append((value, value.tell()))
+            except (AttributeError, IOError, OSError, ValueError):
+                return None
+        elif hasattr(value, '__next__') or hasattr(value, 'next'):
+            return None
+
+    return positions
+
+
+class RetryBudget(object):
+    """Token bucket limiting retries to a ratio of requests.
+
+    Each request deposits ``ratio`` token and each retry withdraws one, so
+    retries can't amplify an outage. The bucket starts full, allowing bursts
+    of ``max_tokens`` retries.
+
+    Args:
+        ratio (float): Retries allowed per request.
+        max_tokens (float): Capacity of the bucket.
+    """
+
+    def __init__(self, ratio=0.2, max_tokens=10):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = float(max_tokens)
+        self._lock = threading.Lock()
+
+    @property
+    def tokens(self):
+        return self._tokens
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self):
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+
+            return False
+
+
+class RetryPolicy(object):
+    """Retry requests on transport errors and retryable status codes.
+
+    Delays are exponential with full jitter: a random delay between 0 and
+    ``min(max, base * factor ** retry)``. A Retry-After header of the response
+    is used as the delay instead, and no retry happens if it's larger than max.
+
+    File objects in the body are rewound before each retry. Requests with a
+    body which can't be rewound, such as a generator, are not retried.
+
+    Args:
+        max (int): Max retries of a request.
+        on_status (list[int]): Retryable status codes.
+        backoff (dict or float): base, factor and max of the delays in seconds,
+            or a float as base.
+        methods (list[str]): Http methods which can be retried, the idempotent
+            methods by default.
+        on_exceptions (tuple): Retryable exceptions, ``retryable_exceptions``
+            of the client by default.
+        budget (RetryBudget): Budget shared by the policies of a consumer.
+    """
+
+    sleep = staticmethod(time.sleep)
+
+    def __init__(self, max=3, on_status=(502, 503, 504), backoff=None,
+                 methods=('get', 'head', 'put', 'delete', 'options'),
+                 on_exceptions=None, budget=None):
+        self.max_retries = max
+        self.on_status = frozenset(on_status)
+
+        backoff = backoff if isinstance(backoff, dict) else {'base': backoff or 0.1}
+        self.backoff_base = backoff.get('base', 0.1)
+        self.backoff_factor = backoff.get('factor', 2)
+        self.backoff_max = backoff.get('max', 10)
+
+        self.methods = frozenset(method.lower() for method in methods)
+        self.on_exceptions = tuple(on_exceptions) if on_exceptions else None
+        self.budget = budget
+
+    @classmethod
+    def from_meta(cls, retry_meta, budget=None):
+        """Create from the retry item of api meta, a dict of kwargs or max retries."""
+        if retry_meta is None or retry_meta is False:
+            return None
+        elif isinstance(retry_meta, RetryPolicy):
+            return retry_meta
+        elif isinstance(retry_meta, dict):
+            return cls(budget=budget, **retry_meta)
+        else:
+            return cls(max=int(retry_meta), budget=budget)
+
+    def backoff(self, retry):
+        delay = min(self.backoff_max, self.backoff_base * self.backoff_factor ** retry)
+        return random.uniform(0, delay)
+
+    def _retry_delay(self, retry, resp):
+        """Get the delay before the retry, None if it should not retry."""
+        if retry >= self.max_retries:
+            return None
+
+        delay = self.backoff(retry)
+
+        if resp is not None:
+            headers = getattr(resp, 'headers', None) or {}
+            retry_after = parse_retry_after(headers.get('Retry-After'))
+            if retry_after is not None:
+                if retry_after > self.backoff_max:
+                    return None
+                delay = retry_after
+
+        if self.budget is not None and not self.budget.withdraw():
+            return None
+
+        return delay
+
+    def request(self, request_meta, send, on_exceptions=None):
+        """Send request_meta and retry it by this policy.
+
+        Args:
+            request_meta (RequestMeta): Request to send.
+            send (callable): Send request_meta and return the response.
+            on_exceptions (tuple): Retryable exceptions if the policy has none.
+
+        Returns:
+            The last response, with ``retry_count`` attr.
+        """
+        if self.budget is not None:
+            self.budget.deposit()
+
+        if request_meta['method'].lower() not in self.methods:
+            return send(request_meta)
+
+        positions = get_body_positions(request_meta)
+        if positions is None:
+            return send(request_meta)
+
+        on_exceptions = self.on_exceptions or on_exceptions or (IOError,)
+        retry = 0
+
+        while True:
+            try:
+                resp = send(request_meta)
+            except on_exceptions:
+                delay = self._retry_delay(retry, None)
+                if delay is None:
+                    raise
+            else:
+                if int(resp.status_code) not in self.on_status:
+                    break
+
+                delay = self._retry_delay(retry, resp)
+                if delay is None:
+                    break
+
+                close = getattr(resp, 'close', None)
+                if close:
+                    close()
+
+            self.sleep(delay)
+            retry += 1
+
+            for file_obj, position in positions:
+                file_obj.seek(position)
+
+        resp.retry_count = retry
+        return resp
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+
+import bisect
+import hashlib
+import itertools
+import random
+import threading
+import time
+
+_clock = getattr(time, 'monotonic', time.time)
+
+
+class _Host(object):
+
+    def __init__(self, base_uri):
+        self.base_uri = base_uri
+        self.outstanding = 0
+        self.latency = 0.0
+        self.failures = 0
+        self.ejected_until = 0.0
+
+    def stats(self):
+        return {'outstanding': self.outstanding, 'latency': self.latency,
+                'failures': self.failures, 'ejected': self.ejected_until > _clock()}
+
+
+class BalancedRouter(object):
+    """Base of the routers which balance the calls among base_uris.
+
+    A router is set as ``consumer.router``, and ``consumer.routing(route_key)``
+    selects a base_uri by ``get``. The apis report the outcome of each routed
+    call to the router, so it tracks health passively: a host failing
+    ``max_failures`` calls in a row is ejected for ``eject_seconds``. Ejected
+    hosts are selected only if all the hosts are ejected.
+
+    Args:
+        base_uris (list[str]): base_uris to balance.
+        max_failures (int): Consecutive failures to eject a host.
+        eject_seconds (float): Seconds an ejected host is skipped for.
+    """
+
+    cacheable_routes = False
+
+    def __init__(self, base_uris, max_failures=5, eject_seconds=30):
+        if not base_uris:
+            raise ValueError('base_uris should not be empty')
+
+        self.max_failures = max_failures
+        self.eject_seconds = eject_seconds
+        self._hosts = [_Host(base_uri) for base_uri in base_uris]
+        self._host_map = dict((host.base_uri, host) for host in self._hosts)
+        self._lock = threading.Lock()
+
+    @property
+    def base_uris(self):
+        return [host.base_uri for host in self._hosts]
+
+    @property
+    def stats(self):
+        """Map each base_uri to the stats of its host."""
+        with self._lock:
+            return dict((host.base_uri, host.stats()) for host in self._hosts)
+
+    def get(self, route_key):
+        with self._lock:
+            now = _clock()
+            hosts = [host for host in self._hosts if host.ejected_until <= now] or self._hosts
+
+            return self._select(hosts, route_key).base_uri
+
+    def _select(self, hosts, route_key):
+        """Select a host from the available hosts, called with lock held."""
+        raise NotImplementedError
+
+    def before_call(self, base_uri):
+        host = self._host_map.get(base_uri)
+        if host is not None:
+            with self._lock:
+                host.outstanding += 1
+
+    def after_call(self, base_uri, failed, elapsed):
+        """Record the outcome of a call.
+
+        Args:
+            base_uri (str): base_uri of the call, ignored if not one of the router.
+            failed (bool): Whether the call failed, None if it's neither
+                a success nor a failure.
+            elapsed (float): Seconds the call took.
+        """
+        host = self._host_map.get(base_uri)
+        if host is None:
+            return
+
+        with self._lock:
+            host.outstanding -= 1
+
+            if failed:
+                host.failures += 1
+                if host.failures >= self.max_failures:
+                    host.ejected_until = _clock() + self.eject_seconds
+                    host.failures = 0
+            elif failed is not None:
+                host.failures = 0
+                self._observe_latency(host, elapsed)
+
+    def _observe_latency(self, host, elapsed):
+        pass
+
+
+class RoundRobinRouter(BalancedRouter):
+    """Select the available hosts in turn."""
+
+    def __init__(self, base_uris, **kwargs):
+        super(RoundRobinRouter, self).__init__(base_uris, **kwargs)
+        self._counter = itertools.count()
+
+    def _select(self, hosts, route_key):
+        return hosts[next(self._counter) % len(hosts)]
+
+
+class LeastOutstandingRouter(BalancedRouter):
+    """Select the host with the fewest calls in flight, ties broken randomly."""
+
+    def _select(self, hosts, route_key):
+        least = min(host.outstanding for host in hosts)
+        return random.choice([host for host in hosts if host.outstanding == least])
+
+
+class EwmaRouter(BalancedRouter):
+    """Select the host with the lowest EWMA latency weighted by calls in flight.
+
+    Hosts without latency observed yet are selected first.
+
+    Args:
+        alpha (float): Weight of the latest latency in the moving average.
+    """
+
+    def __init__(self, base_uris, alpha=0.3, **kwargs):
+        super(EwmaRouter, self).__init__(base_uris, **kwargs)
+        self.alpha = alpha
+
+    def _select(self, hosts, route_key):
+        return min(hosts, key=lambda host: host.latency * (host.outstanding + 1))
+
+    def _observe_latency(self, host, elapsed):
+        if host.latency:
+            host.latency += self.alpha * (elapsed - host.latency)
+        else:
+            host.latency = elapsed
+
+
+def _hash(value):
+    return int(hashlib.md5(str(value).encode('utf-8')).hexdigest()[:16], 16)
+
+
+class ConsistentHashRouter(BalancedRouter):
+    """Select the host of route_key on a hash ring.
+
+    A route_key sticks to its host, and only the keys of an ejected host move
+    to the next hosts on the ring.
+
+    Args:
+        replicas (int): Virtual nodes of each host on the ring.
+    """
+
+    def __init__(self, base_uris, replicas=100, **kwargs):
+        super(ConsistentHashRouter, self).__init__(base_uris, **kwargs)
+        ring = sorted(((_hash('{}#{}'.format(host.base_uri, i)), host)
+                       for host in self._hosts for i in range(replicas)),
+                      key=lambda node: node[0])
+        self._ring_hashes = [hash_ for hash_, _ in ring]
+        self._ring_hosts = [host for _, host in ring]
+
+    def _select(self, hosts, route_key):
+        index = bisect.bisect(self._ring_hashes, _hash(route_key))
+        size = len(self._ring_hosts)
+
+        for offset in range(size):
+            host = self._ring_hosts[(index + offset) % size]
+            if host in hosts:
+                return host
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+from six import string_types
+
+try:
+    import ijson
+except ImportError:  # optional
+    ijson = None
+
+
+def _iter_bytes(content, chunk_size):
+    for start in range(0, len(content), chunk_size):
+        yield content[start:start + chunk_size]
+
+
+def _iter_prefix(value, prefix):
+    """Iterate the items at prefix of a decoded json, like ijson.items does."""
+    if not prefix:
+        yield value
+        return
+
+    name, _, rest = prefix.partition('.')
+    if name == 'item':
+        children = value if isinstance(value, list) else []
+    else:
+        children = [value[name]] if isinstance(value, dict) and name in value else []
+
+    for child in children:
+        for item in _iter_prefix(child, rest):
+            yield item
+
+
+class ResponseStream(object):
+    """Iterator over the body of a response sent with ``stream=True``.
+
+    The connection is released back to the pool when the iteration finishes,
+    fails or the stream is closed, so a handler which stops iterating early
+    should close it, or use it as a context manager.
+
+    Modes:
+        chunks: bytes chunks of at most chunk_size.
+        lines: non-empty lines, decoded if the response has an encoding.
+        ndjson: a decoded json per line.
+        json: the items at ``prefix`` of a json document, 'item' for the items
+            of a top level array. Parsed incrementally if ijson is installed,
+            otherwise the whole body is loaded.
+
+    Attributes:
+        resp: The streamed response.
+    """
+
+    modes = ('chunks', 'lines', 'ndjson', 'json')
+
+    def __init__(self, resp, mode='chunks', chunk_size=8192, prefix='item'):
+        if mode not in self.modes:
+            raise ValueError('unknown stream mode: {}'.format(mode))
+
+        self.resp = resp
+        self.mode = mode
+        self.chunk_size = chunk_size
+        self.prefix = prefix
+        self.closed = False
+        self._iterator = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._iterator is None:
+            self._iterator = self._create_iterator()
+
+        try:
+            return next(self._iterator)
+        except BaseException:
+            self.close()
+            raise
+
+    next = __next__
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            close = getattr(self.resp, 'close', None)
+            if close:
+                close()
+
+    def _iter_content(self):
+        iter_content = getattr(self.resp, 'iter_content', None)
+        if iter_content is not None:
+            return iter_content(self.chunk_size)
+        else:
+            return _iter_bytes(self.resp.content, self.chunk_size)
+
+    def _iter_lines(self):
+        iter_lines = getattr(self.resp, 'iter_lines', None)
+        if iter_lines is not None:
+            lines = iter_lines(self.chunk_size, decode_unicode=True)
+        else:
+            lines = self.resp.text.splitlines()
+
+        return (line for line in lines if line)
+
+    def _create_iterator(self):
+        if self.mode == 'chunks':
+            return self._iter_content()
+        elif self.mode == 'lines':
+            return self._iter_lines()
+        elif self.mode == 'ndjson':
+            return (json.loads(line if isinstance(line, string_types) else line.decode('utf-8'))
+                    for line in self._iter_lines())
+
+        raw = getattr(self.resp, 'raw', None)
+        if ijson is not None and hasattr(raw, 'read'):
+            # decode gzip and deflate like iter_content does
+            raw.decode_content = True
+            return ijson.items(raw, self.prefix, buf_size=self.chunk_size)
+        else:
+            return _iter_prefix(json.loads(self.resp.text), self.prefix)
+
+
+class StreamReader(object):
+    """Create ResponseStream of the responses of a streaming api.
+
+    Args:
+        mode (str): Mode of ResponseStream.
+        chunk_size (int): Size of chunks read from the connection.
+        prefix (str): Prefix of the json items in json mode.
+    """
+
+    def __init__(self, mode='chunks', chunk_size=8192, prefix='item'):
+        if mode not in ResponseStream.modes:
+            raise ValueError('unknown stream mode: {}'.format(mode))
+
+        self.mode = mode
+        self.chunk_size = chunk_size
+        self.prefix = prefix
+
+    @classmethod
+    def from_meta(cls, stream_meta):
+        """Create from the stream item of api meta, a dict of kwargs, a mode or a bool."""
+        if isinstance(stream_meta, dict):
+            return cls(**stream_meta)
+        elif isinstance(stream_meta, string_types):
+            return cls(mode=stream_meta)
+        elif stream_meta:
+            return cls()
+        else:
+            return None
+
+    def __call__(self, resp):
+        return ResponseStream(resp, self.mode, self.chunk_size, self.prefix)
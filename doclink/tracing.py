@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+from six import binary_type, text_type
+
+from .middleware import Middleware
+
+try:
+    from opentelemetry import context as otel_context, propagate, trace
+except ImportError:  # optional
+    otel_context = propagate = trace = None
+
+
+def _body_size(request_meta):
+    data = request_meta.get('data')
+    if isinstance(data, (binary_type, text_type)):
+        return len(data)
+
+    return None
+
+
+def _resp_size(resp):
+    # the body of a streamed resp is not read yet, so only the header is used
+    headers = getattr(resp, 'headers', None) or {}
+    length = headers.get('Content-Length')
+
+    return int(length) if length is not None else None
+
+
+class TracingMiddleware(Middleware):
+    """Trace api calls with OpenTelemetry spans.
+
+    Each call is a client span named by the api name, with attrs of the http
+    method, the uri template instead of the expanded url, status code, retry
+    count and body sizes. The span is the current span during the call, and
+    the trace context is injected into the headers of each request. Without
+    opentelemetry installed, it does nothing.
+
+    Args:
+        tracer_provider: Provider of the tracer, the global one by default.
+        propagator: Propagator to inject trace context, the global one by default.
+    """
+
+    def __init__(self, tracer_provider=None, propagator=None):
+        if trace is None:
+            self.tracer = None
+            return
+
+        self.tracer = trace.get_tracer('doclink', tracer_provider=tracer_provider)
+        self.propagator = propagator or propagate.get_global_textmap()
+
+    def before_build(self, ctx):
+        if self.tracer is None:
+            return
+
+        ctx.span = self.tracer.start_span(ctx.api.name, kind=trace.SpanKind.CLIENT)
+        ctx.span_context = trace.set_span_in_context(ctx.span)
+        ctx.span_token = otel_context.attach(ctx.span_context)
+
+    def before_send(self, ctx):
+        if self.tracer is None:
+            return
+
+        request_meta = ctx.request_meta
+        span = ctx.span
+
+        if ctx.attempt == 1:
+            span.set_attribute('http.request.method', request_meta['method'].upper())
+            span.set_attribute('url.template', request_meta['uri'])
+            span.set_attribute('server.address', request_meta['base_uri'])
+
+            body_size = _body_size(request_meta)
+            if body_size is not None:
+                span.set_attribute('http.request.body.size', body_size)
+
+        headers = request_meta.field_for_update('headers')
+        self.propagator.inject(headers, context=ctx.span_context)
+
+    def after_send(self, ctx):
+        if self.tracer is None:
+            return
+
+        ctx.span.set_attribute('http.response.status_code', int(ctx.resp.status_code))
+
+        resp_size = _resp_size(ctx.resp)
+        if resp_size is not None:
+            ctx.span.set_attribute('http.response.body.size', resp_size)
+
+    def _end(self, ctx):
+        if ctx.attempt > 1:
+            ctx.span.set_attribute('http.request.resend_count', ctx.attempt - 1)
+
+        otel_context.detach(ctx.span_token)
+        ctx.span.end()
+
+    def on_error(self, ctx):
+        # the span is not started if a former middleware failed before_build
+        if self.tracer is None or getattr(ctx, 'span', None) is None:
+            return
+
+        ctx.span.record_exception(ctx.exception)
+        ctx.span.set_attribute('error.type', type(ctx.exception).__name__)
+        ctx.span.set_status(trace.Status(trace.StatusCode.ERROR, str(ctx.exception)))
+        self._end(ctx)
+
+    def after_handle(self, ctx):
+        if self.tracer is None:
+            return
+
+        self._end(ctx)
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+
+import json
+import mmap
+import os
+
+from .bulk import map_calls
+from .exceptions import StatusCodeUnexpectedError
+from .retry import RetryPolicy
+
+_replace = getattr(os, 'replace', os.rename)
+
+
+class Checkpoint(object):
+    """Chunks uploaded, persisted as json to resume an upload.
+
+    The checkpoint is reset if the file or the chunk size changed.
+
+    Args:
+        path (str): Path of the checkpoint file.
+        file_path (str): Path of the uploading file.
+        chunk_size (int): Size of the chunks.
+    """
+
+    def __init__(self, path, file_path, chunk_size):
+        stat = os.stat(file_path)
+        self.path = path
+        self.key = {'file': os.path.abspath(file_path), 'size': stat.st_size,
+                    'mtime': stat.st_mtime, 'chunk_size': chunk_size}
+        self.done = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (IOError, ValueError):
+            return
+
+        if state.get('key') == self.key:
+            self.done = dict((int(index), result) for index, result in state['done'].items())
+
+    def save(self, index, result):
+        try:
+            json.dumps(result)
+        except (TypeError, ValueError):
+            result = None
+
+        self.done[index] = result
+
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'key': self.key, 'done': self.done}, f)
+        _replace(tmp_path, self.path)
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class ChunkedUploader(object):
+    """Upload a file as chunks, a call of the chunk api per chunk.
+
+    Chunks are read from the memory-mapped file, and uploaded concurrently
+    with at most ``concurrency`` chunks in flight. A chunk failed with a
+    retryable exception of the client, or a retryable status code, is retried
+    with backoff, and the upload raises once a chunk fails ``retries`` times.
+    Chunks are not retried by the uploader if the api has its own retry policy.
+    With a checkpoint, the uploaded chunks are skipped by the next upload of
+    the same file.
+
+    Each call gets the chunk by ``chunk_arg``, and optionally its index, offset
+    and ``bytes start-end/total`` range, with the kwargs given to the upload.
+
+    Args:
+        chunk_size (int): Size of the chunks in bytes.
+        concurrency (int): Max chunks uploaded at a time.
+        retries (int): Max retries of a chunk.
+        backoff (dict or float): backoff of the retries, like RetryPolicy.
+        chunk_arg (str): Arg of the chunk content, the raw request body by default.
+        index_arg (str): Arg of the chunk index.
+        index_base (int): Index of the first chunk.
+        offset_arg (str): Arg of the chunk offset in the file.
+        range_arg (str): Arg of the chunk range, such as a Content-Range header.
+    """
+
+    def __init__(self, chunk_size=8 * 1024 * 1024, concurrency=4, retries=3, backoff=None,
+                 chunk_arg='data', index_arg=None, index_base=0, offset_arg=None,
+                 range_arg=None):
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be positive')
+
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        self.retry_policy = RetryPolicy(max=retries, backoff=backoff)
+        self.chunk_arg = chunk_arg
+        self.index_arg = index_arg
+        self.index_base = index_base
+        self.offset_arg = offset_arg
+        self.range_arg = range_arg
+
+    @classmethod
+    def from_meta(cls, upload_meta):
+        """Create from the chunked_upload item of api meta, a dict of kwargs or a chunk size."""
+        if isinstance(upload_meta, dict):
+            return cls(**upload_meta)
+        else:
+            return cls(chunk_size=int(upload_meta))
+
+    def _is_retryable(self, api, error):
+        if isinstance(error, StatusCodeUnexpectedError):
+            return int(error.status_code) in self.retry_policy.on_status
+
+        client = getattr(getattr(api, 'consumer', None), 'client', None)
+        retryable_exceptions = getattr(client, 'retryable_exceptions', None)
+        return isinstance(error, tuple(retryable_exceptions or (IOError,)))
+
+    def _upload_chunk(self, api, index, chunk_kwargs):
+        # the requests of the api are retried by its own policy
+        if getattr(api, 'retry_policy', None) is not None:
+            max_retries = 0
+        else:
+            max_retries = self.retry_policy.max_retries
+        retry = 0
+
+        while True:
+            try:
+                return index, api(**chunk_kwargs)
+            except Exception as e:
+                if retry >= max_retries or not self._is_retryable(api, e):
+                    raise
+
+            self.retry_policy.sleep(self.retry_policy.backoff(retry))
+            retry += 1
+
+    def _chunk_kwargs(self, content, index, offset, total, kwargs):
+        chunk_kwargs = dict(kwargs)
+        chunk_kwargs[self.chunk_arg] = content
+
+        if self.index_arg:
+            chunk_kwargs[self.index_arg] = index + self.index_base
+        if self.offset_arg:
+            chunk_kwargs[self.offset_arg] = offset
+        if self.range_arg:
+            chunk_kwargs[self.range_arg] = 'bytes {}-{}/{}'.format(
+                offset, offset + len(content) - 1, total)
+
+        return chunk_kwargs
+
+    def _iter_calls(self, api, mapped, total, done, kwargs):
+        count = max(1, -(-total // self.chunk_size))
+
+        for index in range(count):
+            if index in done:
+                continue
+
+            offset = index * self.chunk_size
+            content = mapped[offset:offset + self.chunk_size] if mapped is not None else b''
+            chunk_kwargs = self._chunk_kwargs(content, index, offset, total, kwargs)
+
+            yield self._upload_chunk, {'api': api, 'index': index, 'chunk_kwargs': chunk_kwargs}
+
+    def upload(self, api, file_path, checkpoint=None, **kwargs):
+        """Upload the file at file_path by api.
+
+        Args:
+            api (Api): Api uploading a chunk per call.
+            file_path (str): Path of the file.
+            checkpoint (str): Path of the checkpoint file, removed when the
+                upload completes.
+            kwargs: Other kwargs of each call.
+
+        Returns:
+            list: Results of the calls in chunk order. The results of the
+                chunks uploaded before are loaded from the checkpoint, None if
+                they were not json serializable.
+        """
+        checkpoint = Checkpoint(checkpoint, file_path, self.chunk_size) if checkpoint else None
+        results = dict(checkpoint.done) if checkpoint else {}
+
+        with open(file_path, 'rb') as f:
+            total = os.fstat(f.fileno()).st_size
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if total else None
+
+            try:
+                calls = self._iter_calls(api, mapped, total, results, kwargs)
+                for _, (index, result) in map_calls(calls, self.concurrency, ordered=False):
+                    results[index] = result
+                    if checkpoint:
+                        checkpoint.save(index, result)
+            finally:
+                if mapped is not None:
+                    mapped.close()
+
+        if checkpoint:
+            checkpoint.remove()
+
+        return [results[index] for index in sorted(results)]
@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
 
 import os
+import re
 
 from collections import namedtuple
 
+from six import string_types, text_type
+from six.moves.urllib.parse import quote
 from uritemplate import URITemplate
 
 
@@ -27,6 +30,9 @@ class ArgNormalizer(object):
 
     @classmethod
     def _arg_normalize(cls, raw_arg):
+        if isinstance(raw_arg, RawArg):
+            return raw_arg
+
         normalized = {
             'name': None,
             'default': None,
@@ -69,8 +75,95 @@ class ArgNormalizer(object):
         return raw_arg_map
 
 
+class CompiledUriTemplate(object):
+    """Parsed URITemplate with a fast expander for simple templates.
+
+    A template is simple if all of its expressions are plain ``{var}``, without
+    operator, modifier or default. It's expanded with str.format when all the
+    values are strings or numbers, otherwise with the URITemplate.
+    """
+
+    expression_pattern = re.compile(r'\{([^}]+)\}')
+    simple_var_pattern = re.compile(r'^\w+$')
+
+    def __init__(self, uri):
+        self.uri = uri
+        self.template = URITemplate(uri)
+        self._format_str = None
+        self._var_names = None
+        self._compile_simple()
+
+    def _compile_simple(self):
+        parts = self.expression_pattern.split(self.uri)
+        literals, var_names = parts[::2], parts[1::2]
+
+        if not all(self.simple_var_pattern.match(name) for name in var_names):
+            return
+
+        format_parts = []
+        for i, literal in enumerate(literals):
+            format_parts.append(literal.replace('{', '{{').replace('}', '}}'))
+            if i < len(var_names):
+                format_parts.append('{%d}' % i)
+
+        self._format_str = ''.join(format_parts)
+        self._var_names = var_names
+
+    @staticmethod
+    def _quote_simple(value):
+        if isinstance(value, bool) or not isinstance(value, string_types + (int, float)):
+            return None
+
+        if not isinstance(value, string_types):
+            value = str(value)
+        if isinstance(value, text_type):
+            value = value.encode('utf-8')
+
+        return quote(value, safe='')
+
+    def expand(self, var_dict):
+        if self._var_names is not None:
+            values = []
+            for name in self._var_names:
+                value = self._quote_simple(var_dict.get(name))
+                if value is None:
+                    break
+                values.append(value)
+            else:
+                return self._format_str.format(*values)
+
+        return self.template.expand(var_dict)
+
+
+_uri_template_cache = {}
+URI_TEMPLATE_CACHE_SIZE = 1024
+
+
+def compile_uri_template(uri, base_uri=''):
+    """Get the CompiledUriTemplate of base_uri + uri from cache.
+
+    Args:
+        uri (str): The uri template of an api.
+        base_uri (str): The base_uri, which may be selected by routing.
+
+    Returns:
+        CompiledUriTemplate: The cached template.
+    """
+    key = (base_uri, uri)
+    try:
+        return _uri_template_cache[key]
+    except KeyError:
+        pass
+
+    if len(_uri_template_cache) >= URI_TEMPLATE_CACHE_SIZE:
+        _uri_template_cache.clear()
+
+    compiled = _uri_template_cache[key] = CompiledUriTemplate(base_uri + uri)
+    return compiled
+
+
 def raw_args_from_uri(uri):
-    uri_template = URITemplate(uri)
+    uri_template = compile_uri_template(uri).template
 
     raw_args = []
     for uri_var in uri_template.variables:
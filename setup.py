@@ -14,8 +14,17 @@ requires = [
     'pyyaml>=3.12',
     'requests-toolbelt>=0.8.0',
     'six>=1.11.0',
+    'futures>=3.0.0; python_version<"3.2"',
 ]
 
+extras_requires = {
+    'aiohttp': ['aiohttp>=3.0.0'],
+    'ijson': ['ijson>=3.0'],
+    'opentelemetry': ['opentelemetry-api>=1.0'],
+    'orjson': ['orjson'],
+    'ujson': ['ujson'],
+}
+
 
 # The rest you shouldn't have to touch too much :)
 # ------------------------------------------------
@@ -43,6 +52,7 @@ setup(
     author_email=about['__author_email__'],
     packages=find_packages(exclude=("tests",)),
     install_requires=requires,
+    extras_require=extras_requires,
     setup_requires=['pytest-runner'],
     tests_require=['pytest', 'pytest-cov', 'pytest-xdist'],
     include_package_data=True,
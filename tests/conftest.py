@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+
+import json
+import sys
+import threading
+
+import pytest
+from six.moves import BaseHTTPServer, socketserver
+
+from doclink import breaker, router
+from doclink.retry import RetryPolicy
+
+collect_ignore = []
+
+if sys.version_info < (3, 5):
+    collect_ignore.append('test_aiohttp_client.py')
+
+
+class EchoHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Respond the method, path and headers of the request as json.
+
+    GET /json-items/<count> responds a json array of count items instead.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def _echo(self):
+        if self.headers.get('Transfer-Encoding') == 'chunked':
+            body = self._read_chunked()
+        else:
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length) if length else b''
+
+        if self.path.startswith('/json-items/'):
+            count = int(self.path.rsplit('/', 1)[1])
+            content = json.dumps([{'id': i} for i in range(count)]).encode('utf-8')
+        else:
+            content = json.dumps({
+                'method': self.command,
+                'path': self.path,
+                'headers': dict(self.headers.items()),
+                'body_size': len(body),
+            }).encode('utf-8')
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _read_chunked(self):
+        body = b''
+        while True:
+            size = int(self.rfile.readline().split(b';')[0], 16)
+            body += self.rfile.read(size)
+            self.rfile.readline()
+            if not size:
+                return body
+
+    do_GET = do_POST = do_PUT = do_DELETE = _echo
+
+    def log_message(self, *args):
+        pass
+
+
+class ThreadingHTTPServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+@pytest.fixture(scope='module')
+def local_server():
+    """Local http server, yields its base uri."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), EchoHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    yield 'http://127.0.0.1:{}'.format(server.server_address[1])
+
+    server.shutdown()
+    server.server_close()
+
+
+class MockResp(object):
+
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class ScriptedClient(object):
+    """Client which returns or raises the scripted outcomes in order.
+
+    An outcome is a response, an exception to raise, or the status code of
+    a MockResp. The sent request metas are recorded in ``sent``.
+    """
+
+    retryable_exceptions = (IOError,)
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.sent = []
+
+    def request(self, request_meta):
+        self.sent.append(request_meta)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+
+        return MockResp(outcome) if isinstance(outcome, int) else outcome
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record the delays of RetryPolicy.sleep instead of sleeping."""
+    sleeps = []
+    monkeypatch.setattr(RetryPolicy, 'sleep', staticmethod(sleeps.append))
+    return sleeps
+
+
+class Clock(object):
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake clock of the circuit breaker and routers, advanced by its ``now``."""
+    clock = Clock()
+    monkeypatch.setattr(breaker, '_clock', clock)
+    monkeypatch.setattr(router, '_clock', clock)
+    return clock
@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+
+import pytest
+
+aiohttp = pytest.importorskip('aiohttp')
+
+from aiohttp import web  # noqa: E402
+from aiohttp.test_utils import TestServer  # noqa: E402
+
+from doclink import Consumer, jsonify  # noqa: E402
+from doclink.clients.aiohttp_ import AiohttpClient  # noqa: E402
+from doclink.exceptions import StatusCodeUnexpectedError  # noqa: E402
+from doclink.middleware import Middleware  # noqa: E402
+from doclink.tracing import TracingMiddleware  # noqa: E402
+
+
+async def echo(request):
+    result = {
+        'method': request.method,
+        'path': request.path,
+        'args': dict(request.query),
+        'headers': {'X-Custom': request.headers.get('X-Custom')},
+        'form': {},
+        'files': {},
+    }
+
+    if request.content_type == 'multipart/form-data':
+        async for part in await request.multipart():
+            if part.filename:
+                result['files'][part.name] = [part.filename, (await part.read()).decode()]
+            else:
+                result['form'][part.name] = await part.text()
+    elif request.content_type == 'application/x-www-form-urlencoded':
+        result['form'] = dict(await request.post())
+
+    return web.json_response(result)
+
+
+async def status(request):
+    return web.Response(status=int(request.match_info['status_code']))
+
+
+def create_consumer(base_uri):
+    consumer = Consumer(base_uri, client=AiohttpClient())
+
+    @jsonify
+    @consumer.get('/echo/{path_arg}')
+    def get_echo(resp):
+        """
+        <meta>
+            args:
+                query:
+                    - arg1
+                header:
+                    - X-Custom:
+                        alias: custom
+        </meta>
+        """
+
+    @consumer.post('/echo')
+    def form_post(resp):
+        """
+        <meta>
+            args:
+                form:
+                    - field1
+                file:
+                    - file
+        </meta>
+        """
+        return resp.json()
+
+    @consumer.post('/echo')
+    def multipart_post(resp):
+        """
+        <meta>
+            args:
+                multipart:
+                    - field
+                    - file
+        </meta>
+        """
+        return resp.json()
+
+    @consumer.get('/status/{status_code}')
+    def get_status(resp):
+        """
+        <meta>
+            expected_status_code: 200
+        </meta>
+        """
+
+    @consumer.get('/status/{status_code}')
+    async def get_status_async(resp):
+        await asyncio.sleep(0)
+        return resp.status_code
+
+    return consumer
+
+
+def run_with_server(test_coro_func):
+    async def run():
+        app = web.Application()
+        app.router.add_route('*', '/echo', echo)
+        app.router.add_route('*', '/echo/{path_arg}', echo)
+        app.router.add_get('/status/{status_code}', status)
+
+        async with TestServer(app) as server:
+            consumer = create_consumer(str(server.make_url('')))
+            async with consumer.client:
+                await test_coro_func(consumer)
+
+    asyncio.run(run())
+
+
+class TestAiohttpClient(object):
+
+    def test_get(self):
+        async def test(consumer):
+            result = await consumer.get_echo(path_arg='path', arg1='value1', custom='custom')
+
+            assert result['path'] == '/echo/path'
+            assert result['args'] == {'arg1': 'value1'}
+            assert result['headers'] == {'X-Custom': 'custom'}
+
+        run_with_server(test)
+
+    def test_form_with_files(self, tmpdir):
+        file_path = tmpdir.join('report.txt')
+        file_path.write('file content')
+
+        async def test(consumer):
+            result = await consumer.form_post(field1='value1', file=str(file_path))
+
+            assert result['form'] == {'field1': 'value1'}
+            assert result['files'] == {'file': ['report.txt', 'file content']}
+
+        run_with_server(test)
+
+    def test_multipart(self):
+        async def test(consumer):
+            result = await consumer.multipart_post(field='value', file=('name.txt', b'content'))
+
+            assert result['form'] == {'field': 'value'}
+            assert result['files'] == {'file': ['name.txt', 'content']}
+
+        run_with_server(test)
+
+    def test_status_code_unexpected(self):
+        async def test(consumer):
+            with pytest.raises(StatusCodeUnexpectedError):
+                await consumer.get_status(status_code=404)
+
+        run_with_server(test)
+
+    def test_coroutine_func(self):
+        async def test(consumer):
+            assert await consumer.get_status_async(status_code=204) == 204
+
+        run_with_server(test)
+
+    def test_middlewares(self):
+        events = []
+
+        class RecordMiddleware(Middleware):
+            def before_build(self, ctx):
+                events.append('before_build')
+
+            def before_send(self, ctx):
+                ctx.request_meta.field_for_update('headers')['X-Custom'] = 'middleware'
+                events.append('before_send')
+
+            def after_send(self, ctx):
+                events.append(('after_send', ctx.resp.status_code))
+
+            def on_error(self, ctx):
+                events.append(('on_error', type(ctx.exception)))
+
+            def after_handle(self, ctx):
+                events.append(('after_handle', ctx.result['headers']))
+
+        async def test(consumer):
+            consumer.use(RecordMiddleware())
+            await consumer.get_echo(path_arg='path', arg1='value1', custom='custom')
+            with pytest.raises(StatusCodeUnexpectedError):
+                await consumer.get_status(status_code=404)
+
+        run_with_server(test)
+
+        assert events == [
+            'before_build', 'before_send', ('after_send', 200),
+            ('after_handle', {'X-Custom': 'middleware'}),
+            'before_build', 'before_send', ('after_send', 404),
+            ('on_error', StatusCodeUnexpectedError),
+        ]
+
+    def test_tracing(self):
+        sdk_trace = pytest.importorskip('opentelemetry.sdk.trace')
+        from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+        from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+        exporter = InMemorySpanExporter()
+        provider = sdk_trace.TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+
+        async def test(consumer):
+            consumer.use(TracingMiddleware(tracer_provider=provider))
+            await consumer.get_status_async(status_code=204)
+
+        run_with_server(test)
+
+        span, = exporter.get_finished_spans()
+        assert span.name == 'get_status_async'
+        assert span.attributes['http.response.status_code'] == 204
+
+
+def test_sync_only_meta():
+    consumer = Consumer('http://base', client=AiohttpClient())
+
+    with pytest.raises(ValueError):
+        @consumer.get('/uri')
+        def get_retried(resp):
+            """
+            <meta>
+                retry: 2
+            </meta>
+            """
+
+
+def test_stream_not_supported():
+    consumer = Consumer('http://base', client=AiohttpClient())
+
+    with pytest.raises(ValueError):
+        @consumer.get('/uri')
+        def get_streamed(resp):
+            """
+            <meta>
+                stream: true
+            </meta>
+            """
@@ -300,3 +300,76 @@ class TestAuthArgGroup(object):
         assert request_meta['auth'] == {'type': 'digest',
                                         'username': 'username',
                                         'password': 'password'}
+
+
+class TestCallPlan(object):
+
+    def test_process(self):
+        groups = [
+            arg.ArgGroup('params', ['arg1', {'arg2': 'value2_default'}]),
+            arg.ArgGroup('headers', [{'arg3': {'alias': 'alias3'}}])]
+        request_meta = RequestMeta(params={'arg4': 'value4'})
+        plan = arg.CallPlan(groups, request_meta)
+
+        meta_copy = request_meta.copy
+        unused_kwargs = plan.process(meta_copy, dict(arg1='value1', alias3='value3', other='other'))
+
+        assert unused_kwargs == {'other': 'other'}
+        assert meta_copy['params'] == {'arg1': 'value1',
+                                       'arg2': 'value2_default',
+                                       'arg4': 'value4'}
+        assert meta_copy['headers'] == {'arg3': 'value3'}
+        assert request_meta['params'] == {'arg4': 'value4'}
+
+    def test_process_required_arg_missing(self):
+        plan = arg.CallPlan([arg.ArgGroup('params', ['arg1'])], RequestMeta())
+
+        with pytest.raises(RequiredArgMissingError):
+            plan.process(RequestMeta(), {})
+
+    def test_process_current_value(self):
+        request_meta = RequestMeta(params={'arg1': 'current'})
+        plan = arg.CallPlan([arg.ArgGroup('params', ['arg1'])], request_meta)
+
+        meta_copy = request_meta.copy
+        plan.process(meta_copy, {})
+
+        assert meta_copy['params'] == {'arg1': 'current'}
+
+    def test_process_not_required_arg_missing(self):
+        plan = arg.CallPlan(
+            [arg.ArgGroup('params', [{'arg1': {'required': False}}])], RequestMeta())
+        request_meta = RequestMeta()
+        plan.process(request_meta, {})
+
+        assert 'params' not in request_meta
+
+    def test_process_invalid_default(self):
+        def validator(arg_, value):
+            if value != 'value1':
+                raise ValueError(value)
+
+        arg_group = arg.ArgGroup('params', {'arg1': 'other'}, validators={'arg1': validator})
+        plan = arg.CallPlan([arg_group], RequestMeta())
+
+        with pytest.raises(ValueError):
+            plan.process(RequestMeta(), {})
+
+        request_meta = RequestMeta()
+        plan.process(request_meta, {'arg1': 'value1'})
+
+        assert request_meta['params'] == {'arg1': 'value1'}
+
+    def test_process_dynamic_group(self):
+        class TestGroup(arg.ArgGroup):
+            def process_request_meta(self, request_meta, input_kwargs):
+                request_meta['custom'] = input_kwargs['arg1']
+                return {'arg1'}
+
+        plan = arg.CallPlan([TestGroup('custom', ['arg1'])], RequestMeta())
+        request_meta = RequestMeta()
+        unused_kwargs = plan.process(request_meta, {'arg1': 'value1'})
+
+        assert plan.dynamic_groups
+        assert unused_kwargs == {}
+        assert request_meta['custom'] == 'value1'
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from doclink.breaker import CircuitBreaker
+from doclink.consumer import Consumer
+from doclink.exceptions import CircuitOpenError, StatusCodeUnexpectedError
+
+
+class TestCircuitBreaker(object):
+
+    def test_trip_on_failure_rate(self, clock):
+        breaker = CircuitBreaker(failure_rate=0.5, min_calls=4, window_size=4)
+
+        breaker.record_success('a')
+        breaker.record_success('a')
+        breaker.record_failure('a')
+        assert breaker.state('a') == 'closed'
+
+        breaker.record_failure('a')
+        assert breaker.state('a') == 'open'
+        assert breaker.state('b') == 'closed'
+
+        with pytest.raises(CircuitOpenError) as excinfo:
+            breaker.before_call('a')
+
+        assert excinfo.value.base_uri == 'a'
+        assert excinfo.value.retry_after == 30
+        breaker.before_call('b')
+
+    def test_window_slides(self, clock):
+        breaker = CircuitBreaker(failure_rate=0.5, min_calls=2, window_size=2)
+
+        breaker.record_failure('a')
+        breaker.record_success('a')
+        breaker.record_success('a')
+        breaker.record_failure('a')
+
+        assert breaker.state('a') == 'open'
+
+    def test_half_open_probe_success(self, clock):
+        breaker = CircuitBreaker(min_calls=1, reset_timeout=10)
+        breaker.record_failure('a')
+
+        clock.now += 10
+        assert breaker.state('a') == 'half_open'
+
+        breaker.before_call('a')
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call('a')
+
+        breaker.record_success('a')
+        assert breaker.states == {'a': 'closed'}
+
+    def test_half_open_probe_failure(self, clock):
+        breaker = CircuitBreaker(min_calls=1, reset_timeout=10, half_open_probes=2)
+        breaker.record_failure('a')
+        clock.now += 10
+
+        breaker.before_call('a')
+        breaker.release('a')
+        breaker.before_call('a')
+        breaker.before_call('a')
+        breaker.record_failure('a')
+
+        assert breaker.state('a') == 'open'
+
+    def test_from_meta(self):
+        breaker = CircuitBreaker(min_calls=1)
+
+        assert CircuitBreaker.from_meta(breaker) is breaker
+        assert CircuitBreaker.from_meta({'min_calls': 3}).min_calls == 3
+        assert CircuitBreaker.from_meta(None) is None
+
+
+class FlakyClient(object):
+
+    retryable_exceptions = (IOError,)
+
+    def __init__(self):
+        self.status_code = 200
+        self.sent = []
+
+    def request(self, request_meta):
+        self.sent.append(request_meta['base_uri'])
+        if self.status_code is None:
+            raise IOError('connection refused')
+
+        return MockResp(self.status_code)
+
+
+class MockResp(object):
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+def test_api_circuit_breaker(clock):
+    client = FlakyClient()
+    consumer = Consumer('http://base', client=client, expected_status_code=200,
+                        circuit_breaker={'min_calls': 2, 'reset_timeout': 5})
+
+    @consumer.get('/uri')
+    def get_status(resp):
+        return resp.status_code
+
+    client.status_code = 500
+    with pytest.raises(StatusCodeUnexpectedError):
+        get_status()
+
+    client.status_code = None
+    with pytest.raises(IOError):
+        get_status()
+
+    with pytest.raises(CircuitOpenError):
+        get_status()
+    assert len(client.sent) == 2
+
+    consumer.router = {'other': 'http://other'}
+    route = consumer.routing('other')
+    client.status_code = 200
+    assert route.get_status() == 200
+    assert consumer.circuit_breaker.states == {'http://base': 'open', 'http://other': 'closed'}
+
+    clock.now += 5
+    assert get_status() == 200
+    assert consumer.circuit_breaker.state('http://base') == 'closed'
+
+
+def test_api_circuit_breaker_ignore_other_errors(clock):
+    consumer = Consumer('http://base', client=FlakyClient(),
+                        circuit_breaker={'min_calls': 1})
+
+    @consumer.get('/uri')
+    def get_status(resp):
+        raise ValueError()
+
+    with pytest.raises(ValueError):
+        get_status()
+
+    assert consumer.circuit_breaker.state('http://base') == 'closed'
@@ -3,7 +3,9 @@
 import pytest
 
 from doclink.consumer import Consumer
-from doclink.builder import Api, ApiBuilder
+from doclink.builder import Api, ApiBuilder, LazyApi
+from doclink.arg import create_group
+from doclink.exceptions import StatusCodeUnexpectedError
 
 
 class MockClient(object):
@@ -48,6 +50,15 @@ class TestApi(object):
 
         assert arg_group in api.arg_groups
 
+    def test_call_not_change_request_meta(self):
+        api = Api('test', consumer, 'get', 'uri', mock_func)
+        api.update_request_meta(params={'arg1': 'value1'})
+        api.add_arg_group(create_group('params', ['arg2']))
+
+        api(arg2='value2')
+
+        assert api.request_meta['params'] == {'arg1': 'value1'}
+
     def test_partial(self):
         api = Api('test', consumer, 'get', 'uri', mock_func)
         p = api.partial(arg='value')
@@ -73,6 +84,61 @@ class TestApi(object):
         with pytest.raises(ValueError):
             api.add_resp_hook(None)
 
+    def test_resp_pipeline_recompiled(self):
+        cs = Consumer('base_uri', client=MockClient(), expected_status_code=200)
+        api = Api('test', cs, 'get', 'uri', mock_func)
+        cs.apis['test'] = api
+
+        assert api().status_code == 200
+        pipeline = api.resp_pipeline
+        assert api.resp_pipeline is pipeline
+
+        @cs.resp_hook
+        def consumer_hook(resp):
+            return 'consumer'
+
+        assert api.resp_pipeline is not pipeline
+        assert api() == 'consumer'
+
+        api.expected_status_code = 201
+
+        with pytest.raises(StatusCodeUnexpectedError):
+            api()
+
+    def test_resp_pipeline_check_status_override(self):
+        class StatusConsumer(Consumer):
+            @staticmethod
+            def _check_status(resp):
+                return 'checked'
+
+        cs = StatusConsumer('base_uri', client=MockClient())
+        api = Api('test', cs, 'get', 'uri', mock_func)
+
+        assert api() == 'checked'
+
+    def test_resp_pipeline_status_code_is_str(self):
+        class StrStatusClient(object):
+            def request(self, request_meta):
+                return MockResp('200')
+
+        cs = Consumer('base_uri', client=StrStatusClient(), expected_status_code=200)
+        api = Api('test', cs, 'get', 'uri', mock_func)
+
+        assert api().status_code == '200'
+
+    def test_on_request_not_change_request_meta(self):
+        api = Api('test', consumer, 'get', 'uri', mock_func)
+        api.update_request_meta(headers={'A': '1'})
+
+        def on_request(request_meta):
+            request_meta['headers']['X-Req'] = '2'
+
+        api.on_request(on_request)
+        api()
+        api()
+
+        assert api.request_meta['headers'] == {'A': '1'}
+
     def test_on_request(self):
         api = Api('test', consumer, 'get', 'uri', mock_func)
 
@@ -102,3 +168,40 @@ class TestApiBuilder(object):
 
         assert path_arg_group.group_name == 'path'
         assert path_arg_group.arg_map['query1'].default == 'query1'
+
+
+class TestLazyApi(object):
+
+    def test_build_on_call(self):
+        api = LazyApi(consumer, 'get', '/uri/{arg1}', mock_func)
+
+        assert isinstance(api, Api)
+        assert not api.built
+
+        result = api(arg1='value1')
+
+        assert api.built
+        assert result.status_code == 200
+        assert api.request_meta['uri'] == '/uri/{arg1}'
+
+    def test_build_on_attr_access(self):
+        api = LazyApi(consumer, 'get', '/uri/{arg1}', mock_func)
+
+        assert api.arg_groups[0].group_name == 'path'
+        assert api.built
+
+    def test_resp_hook_not_build(self):
+        def mock_hook(resp):
+            return resp.status_code
+
+        api = LazyApi(consumer, 'get', 'uri', mock_func)
+        api.add_resp_hook(mock_hook)
+
+        assert not api.built
+        assert api() == 200
+
+    def test_missing_attr(self):
+        api = LazyApi(consumer, 'get', 'uri', mock_func)
+
+        with pytest.raises(AttributeError):
+            api.missing_attr
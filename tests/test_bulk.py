@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+
+import pytest
+
+from doclink.bulk import map_calls
+from doclink.consumer import Consumer
+
+
+class MockClient(object):
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+
+    def request(self, request_meta):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+
+        time.sleep(request_meta.get('sleep', 0.01))
+
+        with self.lock:
+            self.running -= 1
+
+        return MockResp(request_meta)
+
+
+class MockResp(object):
+
+    def __init__(self, request_meta):
+        self.status_code = 200
+        self.request_meta = request_meta
+
+
+@pytest.fixture
+def consumer():
+    consumer = Consumer('base_uri', client=MockClient())
+
+    @consumer.get('/uri')
+    def get_value(resp):
+        value = resp.request_meta['value']
+        if value < 0:
+            raise ValueError(value)
+
+        return value
+
+    return consumer
+
+
+def test_map_calls_ordered():
+    def func(value, sleep):
+        time.sleep(sleep)
+        return value
+
+    calls = [(func, {'value': i, 'sleep': 0.03 - i * 0.01}) for i in range(3)]
+
+    assert list(map_calls(calls, concurrency=3)) == [0, 1, 2]
+
+
+def test_map_calls_as_completed():
+    def func(value, sleep):
+        time.sleep(sleep)
+        return value
+
+    calls = [(func, {'value': i, 'sleep': 0.06 - i * 0.03}) for i in range(3)]
+
+    assert list(map_calls(calls, concurrency=3, ordered=False)) == [(2, 2), (1, 1), (0, 0)]
+
+
+def test_map_calls_invalid_concurrency():
+    with pytest.raises(ValueError):
+        list(map_calls([], concurrency=0))
+
+
+def test_api_map(consumer):
+    results = consumer.get_value.map(({'value': i} for i in range(20)), concurrency=4)
+
+    assert list(results) == list(range(20))
+    assert consumer.client.max_running == 4
+
+
+def test_api_map_fail_fast(consumer):
+    results = consumer.get_value.map([{'value': 1}, {'value': -1}, {'value': 2}])
+
+    assert next(results) == 1
+    with pytest.raises(ValueError):
+        next(results)
+
+
+def test_api_map_return_exceptions(consumer):
+    results = list(consumer.get_value.map([{'value': 1}, {'value': -1}],
+                                          return_exceptions=True))
+
+    assert results[0] == 1
+    assert isinstance(results[1], ValueError)
+
+
+def test_consumer_gather(consumer):
+    calls = [('get_value', {'value': 1}), (consumer.get_value, {'value': 2})]
+
+    assert list(consumer.gather(calls, concurrency=2)) == [1, 2]
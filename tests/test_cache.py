@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+
+import time
+
+import pytest
+
+from doclink.cache import RespCache
+from doclink.consumer import Consumer
+from doclink.request_meta import RequestMeta
+
+
+class MockClient(object):
+
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+        self.sent = 0
+
+    def request(self, request_meta):
+        self.sent += 1
+        return MockResp(self.status_code, request_meta.get_url())
+
+
+class MockResp(object):
+
+    def __init__(self, status_code, content):
+        self.status_code = status_code
+        self.content = content
+
+
+class ConditionalClient(object):
+
+    def __init__(self):
+        self.etag = '"v1"'
+        self.content = 'content'
+        self.conditional_headers = []
+
+    def request(self, request_meta):
+        headers = request_meta.get('headers') or {}
+        self.conditional_headers.append(
+            dict((name, value) for name, value in headers.items() if name.startswith('If-')))
+
+        if headers.get('If-None-Match') == self.etag:
+            resp = MockResp(304, '')
+        else:
+            resp = MockResp(200, self.content)
+            resp.headers = {'ETag': self.etag, 'Last-Modified': 'Mon, 01 Jan 2018'}
+
+        return resp
+
+
+def create_request_meta(method='get', **kwargs):
+    return RequestMeta(method=method, base_uri='http://base', uri='/uri', **kwargs)
+
+
+class TestRespCache(object):
+
+    def test_hit(self):
+        cache = RespCache()
+        client = MockClient()
+
+        resp = cache.request(create_request_meta(), client.request)
+        resp.hooked = True
+        cached_resp = cache.request(create_request_meta(), client.request)
+
+        assert client.sent == 1
+        assert cached_resp.from_cache is True
+        assert cached_resp.content == resp.content
+        assert not hasattr(cached_resp, 'hooked')
+        assert cache.stats == {'hits': 1, 'revalidated': 0, 'misses': 1,
+                               'size': 1, 'bytes': len(resp.content)}
+
+    def test_key(self):
+        cache = RespCache(headers=['Authorization'])
+        client = MockClient()
+
+        cache.request(create_request_meta(params={'a': 1}), client.request)
+        cache.request(create_request_meta(params={'a': 2}), client.request)
+        cache.request(create_request_meta(params={'a': 1},
+                                          headers={'authorization': 'token'}), client.request)
+        cache.request(create_request_meta(params={'a': 1},
+                                          headers={'X-Other': 'other'}), client.request)
+
+        assert client.sent == 3
+
+    def test_key_credentials(self):
+        cache = RespCache()
+        client = MockClient()
+        auth = {'type': 'basic', 'username': 'user', 'password': 'password'}
+
+        for _ in range(2):
+            cache.request(create_request_meta(), client.request)
+            cache.request(create_request_meta(auth=auth), client.request)
+            cache.request(create_request_meta(auth=dict(auth, username='other')), client.request)
+            cache.request(create_request_meta(cookies={'session': '1'}), client.request)
+            cache.request(create_request_meta(headers={'Authorization': 'token'}), client.request)
+
+        assert client.sent == 5
+
+    def test_not_cacheable(self):
+        cache = RespCache()
+        client = MockClient()
+
+        for _ in range(2):
+            cache.request(create_request_meta('post'), client.request)
+            cache.request(create_request_meta(stream=True), client.request)
+
+        assert client.sent == 4
+        assert cache.stats['misses'] == 0
+
+    def test_status_code_not_cached(self):
+        cache = RespCache()
+        client = MockClient(500)
+
+        cache.request(create_request_meta(), client.request)
+        cache.request(create_request_meta(), client.request)
+
+        assert client.sent == 2
+
+    def test_ttl(self):
+        cache = RespCache(ttl=0.01)
+        client = MockClient()
+
+        cache.request(create_request_meta(), client.request)
+        time.sleep(0.02)
+        cache.request(create_request_meta(), client.request)
+
+        assert client.sent == 2
+
+    def test_lru_eviction(self):
+        cache = RespCache(maxsize=2)
+
+        cache.set('key1', MockResp(200, 'a'))
+        cache.set('key2', MockResp(200, 'b'))
+        cache.get('key1')
+        cache.set('key3', MockResp(200, 'c'))
+
+        assert cache.get('key1') is not None
+        assert cache.get('key2') is None
+        assert cache.get('key3') is not None
+
+    def test_max_bytes(self):
+        cache = RespCache(max_bytes=5)
+
+        cache.set('key1', MockResp(200, 'abc'))
+        cache.set('key2', MockResp(200, 'def'))
+        cache.set('key3', MockResp(200, 'too large'))
+
+        assert cache.get('key1') is None
+        assert cache.get('key2') is not None
+        assert cache.get('key3') is None
+        assert cache.stats['bytes'] == 3
+
+    def test_revalidate_not_modified(self):
+        cache = RespCache(ttl=0)
+        client = ConditionalClient()
+
+        resp = cache.request(create_request_meta(), client.request)
+        revalidated_resp = cache.request(create_request_meta(), client.request)
+
+        assert resp.status_code == 200
+        assert revalidated_resp.status_code == 200
+        assert revalidated_resp.content == 'content'
+        assert revalidated_resp.from_cache is True
+        assert client.conditional_headers == [{}, {'If-None-Match': '"v1"',
+                                                   'If-Modified-Since': 'Mon, 01 Jan 2018'}]
+        assert cache.stats['revalidated'] == 1
+
+    def test_revalidate_modified(self):
+        cache = RespCache(ttl=0)
+        client = ConditionalClient()
+
+        cache.request(create_request_meta(), client.request)
+        client.etag = '"v2"'
+        client.content = 'new content'
+        resp = cache.request(create_request_meta(), client.request)
+        revalidated_resp = cache.request(create_request_meta(), client.request)
+
+        assert resp.content == 'new content'
+        assert revalidated_resp.content == 'new content'
+        assert client.conditional_headers[-1]['If-None-Match'] == '"v2"'
+
+    def test_revalidate_disabled(self):
+        cache = RespCache(ttl=0, revalidate=False)
+        client = ConditionalClient()
+
+        cache.request(create_request_meta(), client.request)
+        cache.request(create_request_meta(), client.request)
+
+        assert client.conditional_headers == [{}, {}]
+
+    def test_revalidate_not_change_request_meta(self):
+        cache = RespCache(ttl=0)
+        client = ConditionalClient()
+        request_meta = create_request_meta(headers={'X-Other': 'other'})
+
+        cache.request(request_meta, client.request)
+        cache.request(request_meta.copy, client.request)
+
+        assert request_meta['headers'] == {'X-Other': 'other'}
+
+    @pytest.mark.parametrize('cache_meta, ttl', [(30, 30), ({'ttl': 10, 'maxsize': 2}, 10)])
+    def test_from_meta(self, cache_meta, ttl):
+        assert RespCache.from_meta(cache_meta).ttl == ttl
+
+    @pytest.mark.parametrize('cache_meta', [False, 0, None])
+    def test_from_meta_disabled(self, cache_meta):
+        assert RespCache.from_meta(cache_meta) is None
+
+    def test_from_meta_enabled(self):
+        assert RespCache.from_meta(True).ttl == 60
+
+
+def test_api_with_cache():
+    consumer = Consumer('http://base', client=MockClient())
+
+    @consumer.get('/uri/{arg1}')
+    def get_value(resp):
+        """
+        <meta>
+            cache:
+                ttl: 60
+        </meta>
+        """
+        return resp.content
+
+    assert get_value(arg1='value') == 'http://base/uri/value'
+    assert get_value(arg1='value') == 'http://base/uri/value'
+    assert consumer.client.sent == 1
+    assert get_value.resp_cache.hits == 1
+
+
+def test_api_not_modified_status_code():
+    consumer = Consumer('http://base', client=ConditionalClient(), expected_status_code=200)
+
+    @consumer.get('/uri')
+    def get_value(resp):
+        """
+        <meta>
+            cache:
+                ttl: 0
+        </meta>
+        """
+        return resp.content
+
+    assert get_value() == 'content'
+    assert get_value() == 'content'
+    assert get_value.resp_cache.revalidated == 1
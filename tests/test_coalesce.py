@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+import threading
+
+import pytest
+
+from doclink.coalesce import SingleFlight
+from doclink.consumer import Consumer
+from doclink.request_meta import RequestMeta
+
+
+class BlockingClient(object):
+    """Client which blocks until released, to keep requests in flight."""
+
+    def __init__(self, error=None):
+        self.sent = 0
+        self.release = threading.Event()
+        self.error = error
+
+    def request(self, request_meta):
+        self.sent += 1
+        self.release.wait()
+
+        if self.error:
+            raise self.error
+
+        return MockResp(request_meta['params'])
+
+
+class MockResp(object):
+
+    def __init__(self, params):
+        self.status_code = 200
+        self.params = params
+
+
+def run_concurrently(func, kwargs_list):
+    results = [None] * len(kwargs_list)
+
+    def run(i, kwargs):
+        try:
+            results[i] = func(**kwargs)
+        except BaseException as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i, kwargs))
+               for i, kwargs in enumerate(kwargs_list)]
+    for thread in threads:
+        thread.start()
+
+    return threads, results
+
+
+def wait_for_waiters(singleflight, count):
+    """Wait until count callers wait for the in-flight requests."""
+    while True:
+        with singleflight._lock:
+            calls = list(singleflight._calls.values())
+        if sum(call.waiters for call in calls) >= count:
+            return
+
+
+@pytest.fixture
+def consumer():
+    consumer = Consumer('http://base', client=BlockingClient(), coalesce=True)
+
+    @consumer.get('/uri')
+    def get_value(resp):
+        """
+        <meta>
+            args:
+                query:
+                    - value
+        </meta>
+        """
+        resp.handled = getattr(resp, 'handled', 0) + 1
+        return resp
+
+    return consumer
+
+
+def test_coalesce_identical_calls(consumer):
+    threads, results = run_concurrently(consumer.get_value, [{'value': 1}] * 5)
+
+    wait_for_waiters(consumer.singleflight, 4)
+    consumer.client.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert consumer.client.sent == 1
+    assert consumer.singleflight.shared == 4
+    assert all(resp.params == {'value': 1} for resp in results)
+    assert all(resp.handled == 1 for resp in results)
+    assert len(set(id(resp) for resp in results)) == 5
+
+
+def test_not_coalesce_different_calls(consumer):
+    threads, results = run_concurrently(consumer.get_value, [{'value': 1}, {'value': 2}])
+
+    while consumer.client.sent < 2:
+        pass
+    consumer.client.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert consumer.singleflight.shared == 0
+    assert [resp.params for resp in results] == [{'value': 1}, {'value': 2}]
+
+
+class Interrupted(BaseException):
+    pass
+
+
+@pytest.mark.parametrize('error_class', [ValueError, Interrupted])
+def test_error_shared(error_class):
+    singleflight = SingleFlight()
+    client = BlockingClient(error=error_class('error'))
+    request_meta = RequestMeta(method='get', params={'value': 1})
+
+    threads, results = run_concurrently(
+        singleflight.request, [{'request_meta': request_meta, 'send': client.request}] * 3)
+
+    wait_for_waiters(singleflight, 2)
+    client.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert client.sent == 1
+    assert all(isinstance(result, error_class) for result in results)
+
+
+def test_key():
+    singleflight = SingleFlight()
+
+    assert singleflight.key(RequestMeta(method='post')) is None
+    assert singleflight.key(RequestMeta(method='get', stream=True)) is None
+    assert singleflight.key(RequestMeta(method='get', params={'a': {}})) is not None
+    assert singleflight.key(RequestMeta(method='get', data=bytearray())) is None
+
+
+@pytest.mark.parametrize('coalesce_meta, methods', [
+    (True, {'get', 'head'}), ({'methods': ['get', 'post']}, {'get', 'post'})])
+def test_from_meta(coalesce_meta, methods):
+    assert SingleFlight.from_meta(coalesce_meta).methods == methods
+    assert SingleFlight.from_meta(False) is None
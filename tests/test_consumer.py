@@ -5,6 +5,7 @@ import unittest
 from doclink import Consumer
 from doclink.consumer import Route
 from doclink.exceptions import StatusCodeUnexpectedError
+from doclink.router import RoundRobinRouter
 
 
 class MockResp(object):
@@ -39,6 +40,24 @@ class ConsumerTestCase(unittest.TestCase):
             def api_func(resp):
                 pass
 
+    def test_client_kwargs(self):
+        cs = Consumer('http://test', client_kwargs={'pool_maxsize': 20})
+
+        self.assertEqual(cs.client._session.adapters['http://']._pool_maxsize, 20)
+
+    def test_lazy_api_warmup(self):
+        cs = Consumer('http://test', lazy=True)
+
+        @cs.get('/uri')
+        def api_func(resp):
+            pass
+
+        self.assertFalse(api_func.built)
+
+        cs.warmup()
+
+        self.assertTrue(api_func.built)
+
     def test_check_status_expect(self):
         api = MockApi(200)
         resp = MockResp(200)
@@ -148,3 +167,74 @@ class ConsumerTestCase(unittest.TestCase):
         route = Route(consumer, 'selected_uri')
 
         assert route.api1 == 'selected_uri'
+
+    def test_route_cached(self):
+        consumer = Consumer('base_uri')
+        consumer.apis['api1'] = MockApi()
+        consumer.router = {'key1': 'base_uri1', 'key2': 'base_uri1'}
+
+        route = consumer.routing('key1')
+
+        assert consumer.routing('key1') is route
+        assert consumer.routing('key2') is route
+
+        consumer.router = {'key1': 'base_uri2'}
+
+        assert consumer.routing('key1').base_uri == 'base_uri2'
+
+    def test_route_not_cached_for_balancing_router(self):
+        consumer = Consumer('base_uri')
+        consumer.router = RoundRobinRouter(['base_uri1', 'base_uri2'])
+
+        routes = [consumer.routing('key') for _ in range(3)]
+
+        assert [route.base_uri for route in routes] == ['base_uri1', 'base_uri2', 'base_uri1']
+        assert routes[0] is routes[2]
+
+    def test_route_cached_opt_in(self):
+        class SwitchRouter(object):
+            base_uri = 'base_uri1'
+
+            def get(self, route_key):
+                return self.base_uri
+
+        consumer = Consumer('base_uri')
+        consumer.router = router = SwitchRouter()
+
+        assert consumer.routing('key').base_uri == 'base_uri1'
+        router.base_uri = 'base_uri2'
+        assert consumer.routing('key').base_uri == 'base_uri2'
+
+        SwitchRouter.cacheable_routes = True
+        router.base_uri = 'base_uri3'
+
+        assert consumer.routing('key') is consumer.routing('key')
+
+    def test_routes_by_uri_limited(self):
+        class ShardRouter(object):
+            def get(self, route_key):
+                return 'http://shard-%d' % route_key
+
+        consumer = Consumer('base_uri')
+        consumer.max_cached_routes = 10
+        consumer.router = ShardRouter()
+
+        for i in range(50):
+            assert consumer.routing(i).base_uri == 'http://shard-%d' % i
+
+        assert not consumer._routes
+        assert len(consumer._routes_by_uri) <= 10
+
+    def test_bound_api_cached(self):
+        consumer = Consumer('base_uri')
+        consumer.router = {'key1': 'base_uri1'}
+
+        @consumer.get('/uri')
+        def get_base_uri(resp):
+            return resp.caller
+
+        route = consumer.routing('key1')
+
+        assert route.get_base_uri is route.get_base_uri
+        assert get_base_uri.routing('key1') is route.get_base_uri
+        assert get_base_uri.routing('key1').keywords == {'base_uri': 'base_uri1'}
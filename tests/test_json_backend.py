@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+import codecs
+import json
+
+import pytest
+import requests
+
+from doclink import json_backend
+from doclink.consumer import Consumer
+from doclink.decorators import jsonify
+from doclink.json_backend import JsonBackend, decode_json, set_json_backend
+
+
+class MockResp(object):
+
+    def __init__(self, content, encoding='utf-8'):
+        self.status_code = 200
+        self.content = content
+        self.encoding = encoding
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding)
+
+    def json(self, **kwargs):
+        return json.loads(self.text, **kwargs)
+
+
+class MockClient(object):
+
+    def __init__(self, content):
+        self.content = content
+
+    def request(self, request_meta):
+        return MockResp(self.content)
+
+
+class CountingBackend(object):
+
+    def __init__(self):
+        self.loads_count = 0
+
+    def loads(self, content):
+        self.loads_count += 1
+        return json.loads(content.decode('utf-8'))
+
+    def dumps(self, obj):
+        return json.dumps(obj).encode('utf-8')
+
+
+@pytest.fixture
+def backend():
+    backend = CountingBackend()
+    set_json_backend(backend)
+    yield backend
+    set_json_backend(None)
+
+
+@pytest.fixture(params=json_backend.BACKENDS)
+def named_backend(request):
+    pytest.importorskip(request.param)
+    set_json_backend(request.param)
+    yield json_backend.get_json_backend()
+    set_json_backend(None)
+
+
+def test_backends(named_backend):
+    obj = {'name': u'文档', 'items': [1, 2.5, None, True]}
+
+    content = named_backend.dumps(obj)
+
+    assert isinstance(content, bytes)
+    assert named_backend.loads(content) == obj
+    assert named_backend.loads(content.decode('utf-8')) == obj
+
+
+def test_dumps_fallback(named_backend):
+    content = named_backend.dumps({1: 'a', 'big': 2 ** 70})
+
+    assert json.loads(content.decode('utf-8')) == {'1': 'a', 'big': 2 ** 70}
+
+
+def test_default_backend():
+    assert json_backend.get_json_backend() is None
+    assert json_backend.loads(b'{"a": 1}') == {'a': 1}
+    assert json_backend.dumps({'a': 1}) == b'{"a":1}'
+
+
+def test_set_invalid_backend():
+    with pytest.raises(ValueError):
+        JsonBackend('simplejson')
+
+    with pytest.raises(ValueError):
+        set_json_backend(object())
+
+
+def test_decode_json(named_backend):
+    obj = {'name': u'文档'}
+    content = json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+    assert decode_json(MockResp(content)) == obj
+    assert decode_json(MockResp(codecs.BOM_UTF8 + content, encoding=None)) == obj
+    assert decode_json(MockResp(json.dumps(obj).encode('utf-16'), encoding='utf-16')) == obj
+
+
+def test_decode_error(named_backend):
+    resp = requests.Response()
+    resp._content = b'{invalid'
+    resp.encoding = 'utf-8'
+
+    with pytest.raises(requests.exceptions.JSONDecodeError):
+        decode_json(resp)
+
+
+def test_memoized_json(backend):
+    consumer = Consumer('http://base', client=MockClient(b'{"code": 0}'))
+
+    @consumer.resp_hook
+    def check_code(resp):
+        assert resp.json()['code'] == 0
+
+    @jsonify
+    @consumer.get('/uri')
+    def get_json(resp):
+        pass
+
+    assert get_json() == {'code': 0}
+    assert backend.loads_count == 1
+    assert get_json() == {'code': 0}
+    assert backend.loads_count == 2
+
+
+def test_memoized_json_kwargs(backend):
+    consumer = Consumer('http://base', client=MockClient(b'{"code": 0}'))
+
+    @consumer.get('/uri')
+    def get_json(resp):
+        return resp.json(object_hook=lambda obj: sorted(obj))
+
+    assert get_json() == ['code']
+    assert backend.loads_count == 0
@@ -1,9 +1,15 @@
 # -*- coding: utf-8 -*-
 
+import os
+import shutil
+import tempfile
 import unittest
 
+import yaml
+
 from doclink import meta_parser
 from doclink.exceptions import InvalidApimetaItemError
+from doclink.utils import RawArg
 
 
 class FakeBuilder(object):
@@ -19,6 +25,21 @@ class FakeBuilder(object):
     def build_expected_status_code(self, status):
         self.expected_status_code = status
 
+    def build_cache(self, cache):
+        self.cache = cache
+
+    def build_coalesce(self, coalesce):
+        self.coalesce = coalesce
+
+    def build_retry(self, retry):
+        self.retry = retry
+
+    def build_stream(self, stream):
+        self.stream = stream
+
+    def build_chunked_upload(self, chunked_upload):
+        self.chunked_upload = chunked_upload
+
 
 class TestParseObserver(unittest.TestCase):
 
@@ -29,6 +50,11 @@ class TestParseObserver(unittest.TestCase):
         self.assertIn('base_uri', event_handle_map)
         self.assertIn('timeout', event_handle_map)
         self.assertIn('expected_status_code', event_handle_map)
+        self.assertIn('cache', event_handle_map)
+        self.assertIn('coalesce', event_handle_map)
+        self.assertIn('retry', event_handle_map)
+        self.assertIn('stream', event_handle_map)
+        self.assertIn('chunked_upload', event_handle_map)
 
     def test_trigger_event(self):
         builder = FakeBuilder()
@@ -39,11 +65,21 @@ class TestParseObserver(unittest.TestCase):
         parse_observer.trigger_event('base_uri', 'base_uri')
         parse_observer.trigger_event('timeout', 30)
         parse_observer.trigger_event('expected_status_code', 200)
+        parse_observer.trigger_event('cache', {'ttl': 60})
+        parse_observer.trigger_event('coalesce', True)
+        parse_observer.trigger_event('retry', {'max': 3})
+        parse_observer.trigger_event('stream', 'lines')
+        parse_observer.trigger_event('chunked_upload', {'chunk_size': 1024})
 
         self.assertEqual(builder.arg_group_name, {'group_name': 'arg1'})
         self.assertEqual(builder.base_uri, 'base_uri')
         self.assertEqual(builder.timeout, 30)
         self.assertEqual(builder.expected_status_code, 200)
+        self.assertEqual(builder.cache, {'ttl': 60})
+        self.assertEqual(builder.coalesce, True)
+        self.assertEqual(builder.retry, {'max': 3})
+        self.assertEqual(builder.stream, 'lines')
+        self.assertEqual(builder.chunked_upload, {'chunk_size': 1024})
 
     def test_trigger_event_invalid(self):
         builder = FakeBuilder()
@@ -161,3 +197,85 @@ class YamlParserTestCase(unittest.TestCase):
             builder.events,
             {'arg_group': ('params', ['client_id']),
              'timeout': (30,)})
+
+    def test_load_memoized(self):
+        meta_doc = """
+        timeout: 30
+        """
+        meta_dict = meta_parser.YamlParser.load(meta_doc)
+
+        self.assertEqual(meta_dict, {'timeout': 30})
+        self.assertIs(meta_parser.YamlParser.load(meta_doc), meta_dict)
+
+    def test_load_unsafe(self):
+        meta_doc = """
+        timeout: !!python/object/apply:os.getcwd []
+        """
+
+        with self.assertRaises(yaml.YAMLError):
+            meta_parser.YamlParser.load(meta_doc)
+
+
+class MetaCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+        @meta_parser.ParserFactory.register_parser('test')
+        class TestParser(meta_parser.ParserBase):
+            parsed_count = 0
+
+            def parse(self):
+                TestParser.parsed_count += 1
+                self.observer.trigger_event('arg_group', 'params', ['arg1', {'arg2': 'value2'}])
+                self.observer.trigger_event('timeout', 30)
+
+        self.parser_cls = TestParser
+        meta_parser.set_cache_dir(self.cache_dir)
+
+    def tearDown(self):
+        meta_parser.set_cache_dir(None)
+        del meta_parser.ParserFactory._parser_map['test']
+        shutil.rmtree(self.cache_dir)
+
+    def _parse(self, pydoc):
+        builder = FakeBuilder()
+        parser = meta_parser.creat_parser(pydoc)
+        parser.set_builder(builder)
+        parser.parse()
+
+        return builder
+
+    def test_parse_cached(self):
+        pydoc = '<meta:test>meta</meta>'
+        builder = self._parse(pydoc)
+        cached_builder = self._parse(pydoc)
+
+        self.assertEqual(self.parser_cls.parsed_count, 1)
+        self.assertEqual(cached_builder.timeout, 30)
+        self.assertEqual(cached_builder.arg_group_name, builder.arg_group_name)
+        self.assertEqual(
+            cached_builder.arg_group_name,
+            {'params': [RawArg('arg1', None, True, None),
+                        RawArg('arg2', None, True, 'value2')]})
+
+    def test_parse_other_meta_doc(self):
+        self._parse('<meta:test>meta</meta>')
+        self._parse('<meta:test>other meta</meta>')
+
+        self.assertEqual(self.parser_cls.parsed_count, 2)
+
+    def test_get_invalid_cache_file(self):
+        meta_cache = meta_parser.MetaCache(self.cache_dir)
+        key = meta_cache.key('test', 'meta')
+
+        with open(os.path.join(self.cache_dir, key + '.json'), 'w') as f:
+            f.write('invalid')
+
+        self.assertIsNone(meta_cache.get(key))
+
+    def test_set_not_serializable(self):
+        meta_cache = meta_parser.MetaCache(self.cache_dir)
+        meta_cache.set('key', [('timeout', object())])
+
+        self.assertIsNone(meta_cache.get('key'))
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from doclink.consumer import Consumer
+from doclink.exceptions import StatusCodeUnexpectedError
+from doclink.metrics import (
+    Histogram, Metrics, PhaseTimer, PrometheusExporter, StatsdExporter, PHASES)
+
+
+class MockClient(object):
+
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+
+    def request(self, request_meta):
+        return MockResp(self.status_code)
+
+
+class MockResp(object):
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class FakeStatsd(object):
+
+    def __init__(self):
+        self.timings = {}
+        self.counters = {}
+
+    def timing(self, name, value):
+        self.timings[name] = value
+
+    def incr(self, name):
+        self.counters[name] = self.counters.get(name, 0) + 1
+
+
+class FakeMetric(object):
+
+    def __init__(self):
+        self.values = {}
+
+    def labels(self, **labels):
+        self.current = tuple(sorted(labels.items()))
+        return self
+
+    def observe(self, value):
+        self.values[self.current] = value
+
+    def inc(self):
+        self.values[self.current] = self.values.get(self.current, 0) + 1
+
+
+def test_histogram():
+    histogram = Histogram(window=100)
+    for value in range(1, 201):
+        histogram.observe(value)
+
+    assert histogram.count == 200
+    assert histogram.percentile(50) == 151
+    assert histogram.summary()['p99'] == 199
+    assert Histogram().percentile(50) is None
+
+
+def test_phase_timer():
+    timer = PhaseTimer()
+    timer.lap('args')
+    timer.stop()
+
+    assert set(timer.timings) == {'args', 'total'}
+    assert timer.timings['total'] >= timer.timings['args'] >= 0
+
+
+def test_metrics_record():
+    statsd = FakeStatsd()
+    metrics = Metrics(exporters=[StatsdExporter(statsd)])
+    metrics.record('api', {'send': 0.2, 'total': 0.3})
+    metrics.record('api', {'send': 0.1, 'total': 0.1}, error=True)
+
+    stats = metrics.stats()['api']
+
+    assert stats['count'] == 2
+    assert stats['errors'] == 1
+    assert stats['phases']['send']['p50'] == 0.1
+    assert stats['phases']['send']['p99'] == 0.2
+    assert statsd.timings['doclink.api.total'] == 100
+    assert statsd.counters == {'doclink.api.calls': 1, 'doclink.api.errors': 1}
+
+    metrics.reset()
+    assert metrics.stats() == {}
+
+
+def test_prometheus_exporter():
+    histogram, errors = FakeMetric(), FakeMetric()
+    exporter = PrometheusExporter(histogram, errors)
+    exporter.export('api', {'total': 0.5}, True)
+
+    assert histogram.values == {(('api', 'api'), ('phase', 'total')): 0.5}
+    assert errors.values == {(('api', 'api'),): 1}
+
+
+def test_api_metrics():
+    client = MockClient()
+    consumer = Consumer('http://base', client=client, expected_status_code=200, metrics=True)
+
+    @consumer.get('/uri/{id}')
+    def get_resp(resp):
+        return resp
+
+    resp = get_resp(id=1)
+
+    assert set(resp.timings) == set(PHASES)
+    assert resp.timings['total'] >= resp.timings['send']
+
+    client.status_code = 500
+    with pytest.raises(StatusCodeUnexpectedError):
+        get_resp(id=1)
+
+    stats = consumer.metrics.stats()['get_resp']
+    assert stats['count'] == 2
+    assert stats['errors'] == 1
+    assert stats['phases']['total']['count'] == 2
+    assert stats['phases']['handler']['count'] == 1
+
+
+def test_api_metrics_disabled():
+    consumer = Consumer('http://base', client=MockClient())
+
+    @consumer.get('/uri')
+    def get_resp(resp):
+        return resp
+
+    assert not hasattr(get_resp(), 'timings')
+    assert consumer.metrics is None
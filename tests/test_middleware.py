@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from doclink.consumer import Consumer
+from doclink.exceptions import StatusCodeUnexpectedError
+from doclink.middleware import CallContext, Middleware
+
+from .conftest import MockResp, ScriptedClient
+
+
+class RecordMiddleware(Middleware):
+
+    def __init__(self, name, events):
+        self.name = name
+        self.events = events
+
+    def before_build(self, ctx):
+        self.events.append((self.name, 'before_build'))
+
+    def before_send(self, ctx):
+        self.events.append((self.name, 'before_send', ctx.attempt))
+
+    def after_send(self, ctx):
+        self.events.append((self.name, 'after_send', ctx.resp.status_code))
+
+    def on_error(self, ctx):
+        self.events.append((self.name, 'on_error', type(ctx.exception)))
+
+    def after_handle(self, ctx):
+        self.events.append((self.name, 'after_handle', ctx.result))
+
+
+def create_api(client, **consumer_kwargs):
+    consumer = Consumer('http://base', client=client, expected_status_code=200,
+                        **consumer_kwargs)
+
+    @consumer.get('/uri/{id}')
+    def get_status(resp):
+        return resp.status_code
+
+    return consumer, get_status
+
+
+def test_hook_order():
+    events = []
+    consumer, get_status = create_api(ScriptedClient(200))
+    consumer.use(RecordMiddleware('consumer', events))
+    get_status.use(RecordMiddleware('api', events))
+
+    assert get_status(id=1) == 200
+    assert events == [
+        ('consumer', 'before_build'),
+        ('api', 'before_build'),
+        ('consumer', 'before_send', 1),
+        ('api', 'before_send', 1),
+        ('api', 'after_send', 200),
+        ('consumer', 'after_send', 200),
+        ('api', 'after_handle', 200),
+        ('consumer', 'after_handle', 200),
+    ]
+
+
+def test_attempts_and_error(sleeps):
+    events = []
+    consumer, get_status = create_api(ScriptedClient(503, 503), retry={'max': 1})
+    consumer.use(RecordMiddleware('consumer', events))
+
+    with pytest.raises(StatusCodeUnexpectedError):
+        get_status(id=1)
+
+    assert events == [
+        ('consumer', 'before_build'),
+        ('consumer', 'before_send', 1),
+        ('consumer', 'after_send', 503),
+        ('consumer', 'before_send', 2),
+        ('consumer', 'after_send', 503),
+        ('consumer', 'on_error', StatusCodeUnexpectedError),
+    ]
+
+
+def test_change_kwargs_and_request():
+    client = ScriptedClient(200)
+    consumer, get_status = create_api(client)
+
+    class Inject(Middleware):
+        def before_build(self, ctx):
+            ctx.kwargs = dict(ctx.kwargs, id=2)
+
+        def before_send(self, ctx):
+            ctx.request_meta.field_for_update('headers')['X-Trace'] = 'trace'
+
+    consumer.use(Inject())
+    get_status(id=1)
+
+    assert client.sent[0].get_url() == 'http://base/uri/2'
+    assert client.sent[0]['headers'] == {'X-Trace': 'trace'}
+    assert consumer.request_meta.get('headers') is None
+
+
+def test_short_circuit_and_replace_result():
+    client = ScriptedClient()
+    consumer, get_status = create_api(client)
+
+    class Stub(Middleware):
+        def before_send(self, ctx):
+            ctx.resp = MockResp(200)
+
+        def after_handle(self, ctx):
+            ctx.result = ('stub', ctx.result)
+
+    get_status.use(Stub())
+
+    assert get_status(id=1) == ('stub', 200)
+    assert client.sent == []
+
+
+def test_recover_on_error():
+    consumer, get_status = create_api(ScriptedClient(500))
+
+    class Fallback(Middleware):
+        def on_error(self, ctx):
+            if isinstance(ctx.exception, StatusCodeUnexpectedError):
+                ctx.exception = None
+                ctx.result = 'fallback'
+
+    consumer.use(Fallback())
+
+    assert get_status(id=1) == 'fallback'
+
+
+def test_context_timing():
+    ctx = CallContext(None, {}, [])
+
+    assert ctx.elapsed >= 0
+    assert ctx.attempt == 0
+
+
+def test_after_handle_raises():
+    events = []
+    consumer, get_status = create_api(ScriptedClient(200))
+    consumer.use(RecordMiddleware('outer', events))
+
+    class Broken(RecordMiddleware):
+        def after_handle(self, ctx):
+            raise ValueError('broken')
+
+    consumer.use(Broken('broken', events))
+    consumer.use(RecordMiddleware('inner', events))
+
+    with pytest.raises(ValueError):
+        get_status(id=1)
+
+    assert events[-3:] == [
+        ('inner', 'after_handle', 200),
+        ('broken', 'on_error', ValueError),
+        ('outer', 'on_error', ValueError),
+    ]
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+import io
+
+import pytest
+from requests_toolbelt import MultipartEncoder
+
+from doclink.clients.multipart import (
+    create_multipart_body, has_known_length, iter_multipart, to_form_fields)
+
+
+def test_iter_multipart_same_as_encoder():
+    fields = [('name', 'value'),
+              ('file', ('a.txt', io.BytesIO(b'file content'), 'text/plain')),
+              ('other', ('b.bin', b'bytes'))]
+    encoder = MultipartEncoder(fields, boundary='boundary')
+
+    fields[1] = ('file', ('a.txt', iter([b'file ', b'content']), 'text/plain'))
+
+    assert b''.join(iter_multipart(fields, b'boundary')) == encoder.to_string()
+
+
+def test_has_known_length():
+    with open('tox.ini', 'rb') as f:
+        assert has_known_length(('tox.ini', f))
+
+    assert has_known_length('value')
+    assert not has_known_length(('data.bin', (chunk for chunk in [b'data'])))
+
+
+def test_create_multipart_body():
+    body, content_type = create_multipart_body([('name', 'value')])
+
+    assert isinstance(body, MultipartEncoder)
+    assert content_type == body.content_type
+
+    body, content_type = create_multipart_body([('file', ('data.bin', iter([b'data'])))])
+    boundary = content_type.split('boundary=')[1]
+
+    assert b''.join(body).startswith(b'--' + boundary.encode('ascii'))
+
+
+def test_to_form_fields():
+    fields = to_form_fields({'a': 1, 'b': ['x', 'y'], 'c': None})
+
+    assert sorted(fields) == [('a', '1'), ('b', 'x'), ('b', 'y')]
+
+    fields = to_form_fields([('a', 1), ('a', 2), ('b', ['x'])])
+
+    assert fields == [('a', '1'), ('a', '2'), ('b', 'x')]
+
+    with pytest.raises(ValueError):
+        to_form_fields(b'a=1')
@@ -27,6 +27,36 @@ class TestRequestMeta(object):
         assert copy == request_meta
         assert copy is not request_meta
 
+    def test_copy_shares_fields(self):
+        request_meta = RequestMeta(params={'arg1': 'value1'})
+        copy = request_meta.copy
+
+        assert copy['params'] is request_meta['params']
+
+    def test_field_for_update(self):
+        request_meta = RequestMeta(params={'arg1': 'value1'})
+        copy = request_meta.copy
+
+        params = copy.field_for_update('params')
+        params['arg2'] = 'value2'
+
+        assert copy.field_for_update('params') is params
+        assert copy['params'] == {'arg1': 'value1', 'arg2': 'value2'}
+        assert request_meta['params'] == {'arg1': 'value1'}
+
+    def test_field_for_update_missing(self):
+        request_meta = RequestMeta()
+        request_meta.field_for_update('headers')['key'] = 'value'
+
+        assert request_meta['headers'] == {'key': 'value'}
+
+    def test_deepcopy(self):
+        request_meta = RequestMeta(params={'arg1': 'value1'})
+        copy = request_meta.deepcopy()
+
+        assert copy == request_meta
+        assert copy['params'] is not request_meta['params']
+
     def test_get_url_with_path_arg(self):
         request_meta = RequestMeta(
             uri='uri/{arg1}',
@@ -1,6 +1,19 @@
 # -*- coding: utf-8 -*-
 
+import gc
+import threading
+import time
+import weakref
+
+import pytest
+from requests.adapters import HTTPAdapter
+from requests_toolbelt import MultipartEncoder
+
+from doclink import Consumer, json_backend
+from doclink.clients import requests_
 from doclink.clients.requests_ import RequestsClient
+from doclink.json_backend import JsonBackend
+from doclink.request_meta import RequestMeta
 
 
 class FakeRequestMeta(dict):
@@ -140,3 +153,218 @@ class TestRequestsClient(object):
             'unknown': 'unknown'})
 
         assert client.request(request_meta) == 'ok'
+
+
+class TestStreamingUpload(object):
+
+    def test_files_encoder(self):
+        client = RequestsClient()
+        opened_files = []
+        request_meta = FakeRequestMeta({
+            'method': 'post',
+            'data': {'name': 'value'},
+            'files': {'field': 'tox.ini'},
+            'headers': {'Accept': 'application/json'}})
+
+        kwargs = client._get_sending_kwargs(request_meta, opened_files)
+
+        assert isinstance(kwargs['data'], MultipartEncoder)
+        assert kwargs['headers']['Content-Type'] == kwargs['data'].content_type
+        assert request_meta['headers'] == {'Accept': 'application/json'}
+        assert [f.name for f in opened_files] == ['tox.ini']
+
+        for opened_file in opened_files:
+            opened_file.close()
+
+    def test_json_arg(self):
+        request_meta = RequestMeta(method='post', base_uri='http://base', uri='/upload',
+                                   json={'name': 'value'})
+
+        kwargs = RequestsClient._get_sending_kwargs(request_meta)
+
+        assert kwargs['json'] == {'name': 'value'}
+        assert 'data' not in kwargs
+
+    def test_json_body(self, local_server, monkeypatch):
+        monkeypatch.setattr(json_backend, '_backend', JsonBackend('json'))
+        client = RequestsClient()
+        request_meta = RequestMeta(method='post', base_uri=local_server, uri='/upload',
+                                   json={'name': u'文档'})
+
+        kwargs = client._get_sending_kwargs(request_meta)
+        echo = client.request(request_meta).json()
+
+        assert 'json' not in kwargs
+        assert kwargs['headers'] == {'Content-Type': 'application/json'}
+        assert echo['headers']['Content-Type'] == 'application/json'
+        assert echo['body_size'] == len(kwargs['data'])
+
+    def test_files_closed(self, local_server, monkeypatch):
+        client = RequestsClient()
+        opened_files = []
+        get_sending_kwargs = client._get_sending_kwargs
+
+        def spy_sending_kwargs(request_meta, files):
+            opened_files.append(files)
+            return get_sending_kwargs(request_meta, files)
+
+        monkeypatch.setattr(client, '_get_sending_kwargs', spy_sending_kwargs)
+        request_meta = RequestMeta(method='post', base_uri=local_server, uri='/upload',
+                                   files={'field': 'tox.ini'})
+
+        echo = client.request(request_meta).json()
+
+        with open('tox.ini', 'rb') as f:
+            assert echo['body_size'] > len(f.read())
+        assert echo['headers']['Content-Length'] == str(echo['body_size'])
+        assert opened_files[0][0].closed
+
+    def test_generator_chunked(self, local_server):
+        client = RequestsClient()
+        chunks = (b'x' * 1024 for _ in range(64))
+        request_meta = RequestMeta(method='post', base_uri=local_server, uri='/upload',
+                                   multipart={'field': ('data.bin', chunks), 'name': 'value'})
+
+        echo = client.request(request_meta).json()
+
+        assert echo['headers']['Transfer-Encoding'] == 'chunked'
+        assert echo['body_size'] > 64 * 1024
+
+
+class TestConnectionPool(object):
+
+    def test_default_adapters(self):
+        client = RequestsClient()
+
+        assert isinstance(client._session.adapters['http://'], HTTPAdapter)
+        assert client._session.adapters['http://']._pool_maxsize == 10
+
+    def test_mount_adapters(self):
+        client = RequestsClient(pool_connections=5, pool_maxsize=20, pool_block=True,
+                                host_limits={'http://slow.host': 2,
+                                             'http://fast.host': {'pool_maxsize': 50,
+                                                                  'max_retries': 3}})
+        adapters = client._session.adapters
+
+        assert adapters['http://']._pool_connections == 5
+        assert adapters['https://']._pool_maxsize == 20
+        assert adapters['https://']._pool_block is True
+        assert adapters['http://slow.host']._pool_maxsize == 2
+        assert adapters['http://slow.host']._pool_block is True
+        assert adapters['http://fast.host']._pool_maxsize == 50
+        assert adapters['http://fast.host'].max_retries.total == 3
+
+    def test_pool_stats(self, local_server):
+        client = RequestsClient(pool_maxsize=4)
+        request_meta = RequestMeta(method='get', base_uri=local_server, uri='/path')
+
+        for _ in range(3):
+            client.request(request_meta).close()
+
+        stats = client.pool_stats()
+
+        assert stats[local_server] == {'maxsize': 4,
+                               'in_use': 0,
+                               'idle': 1,
+                               'num_connections': 1,
+                               'num_requests': 3}
+
+
+class TestThreadLocalSession(object):
+
+    def test_session_with_thread_local(self):
+        with pytest.raises(ValueError):
+            RequestsClient(FakeSession(), thread_local=True)
+
+    def test_session_per_thread(self):
+        client = RequestsClient(pool_maxsize=4, thread_local=True)
+        sessions = []
+
+        def get_session():
+            sessions.append(client.session)
+
+        threads = [threading.Thread(target=get_session) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert client.session is client.session
+        assert len(set(id(session) for session in sessions + [client.session])) == 4
+        assert all(session.adapters['http://']._pool_maxsize == 4 for session in sessions)
+
+    def test_session_closed_with_thread(self):
+        client = RequestsClient(thread_local=True)
+        closed = []
+
+        def get_session():
+            session = client.session
+            session.close = lambda: closed.append(True)
+
+        thread = threading.Thread(target=get_session)
+        thread.start()
+        thread.join()
+        gc.collect()
+
+        assert len(closed) == 1
+        assert client.sessions == []
+
+    def test_sessions_closed_at_exit(self):
+        clients = [RequestsClient(), RequestsClient(thread_local=True)]
+        closed = []
+
+        for client in clients:
+            client.session.close = lambda: closed.append(True)
+
+        requests_._close_clients()
+
+        assert len(closed) == 2
+
+    def test_client_not_kept_alive(self):
+        client_refs = [weakref.ref(RequestsClient()),
+                       weakref.ref(RequestsClient(thread_local=True))]
+        gc.collect()
+
+        assert [client_ref() for client_ref in client_refs] == [None, None]
+
+    def test_stress(self, local_server):
+        consumer = Consumer(local_server, client=RequestsClient(thread_local=True))
+
+        @consumer.get('/items/{item_id}')
+        def get_item(resp):
+            return resp.json()['path']
+
+        errors = []
+        finished = []
+        exit_event = threading.Event()
+
+        def worker(worker_id):
+            try:
+                for i in range(50):
+                    item_id = '{}-{}'.format(worker_id, i)
+                    assert get_item(item_id=item_id) == '/items/' + item_id
+            except Exception as e:
+                errors.append(e)
+
+            finished.append(worker_id)
+            # keep the thread and its session alive until checked
+            exit_event.wait()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(16)]
+        for thread in threads:
+            thread.start()
+
+        while len(finished) < 16:
+            time.sleep(0.01)
+
+        try:
+            assert errors == []
+            assert len(consumer.client.sessions) == 16
+            assert sum(stats['num_requests']
+                       for stats in consumer.client.pool_stats().values()) == 16 * 50
+        finally:
+            exit_event.set()
+            for thread in threads:
+                thread.join()
+
+            consumer.client.close()
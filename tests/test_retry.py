@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+import io
+
+import pytest
+
+from doclink.consumer import Consumer
+from doclink.exceptions import StatusCodeUnexpectedError
+from doclink.request_meta import RequestMeta
+from doclink.retry import RetryBudget, RetryPolicy, parse_retry_after
+
+from .conftest import MockResp, ScriptedClient
+
+
+def get_meta(method='get'):
+    return RequestMeta(method=method)
+
+
+class TestRetryPolicy(object):
+
+    def test_retry_on_status(self, sleeps):
+        failed_resp = MockResp(503)
+        client = ScriptedClient(failed_resp, MockResp(200))
+        resp = RetryPolicy(backoff={'base': 1, 'max': 8}).request(get_meta(), client.request)
+
+        assert resp.status_code == 200
+        assert resp.retry_count == 1
+        assert failed_resp.closed
+        assert 0 <= sleeps[0] <= 1
+
+    def test_retry_on_exception(self, sleeps):
+        client = ScriptedClient(IOError(), IOError(), MockResp(200))
+        resp = RetryPolicy().request(get_meta(), client.request, client.retryable_exceptions)
+
+        assert resp.retry_count == 2
+        assert len(client.sent) == 3
+
+    def test_exception_not_retryable(self, sleeps):
+        client = ScriptedClient(ValueError(), MockResp(200))
+
+        with pytest.raises(ValueError):
+            RetryPolicy().request(get_meta(), client.request, client.retryable_exceptions)
+
+    def test_max_retries(self, sleeps):
+        client = ScriptedClient(MockResp(503), MockResp(503), MockResp(503))
+        resp = RetryPolicy(max=2).request(get_meta(), client.request)
+
+        assert resp.status_code == 503
+        assert resp.retry_count == 2
+        assert len(sleeps) == 2
+
+    def test_max_retries_on_exception(self, sleeps):
+        client = ScriptedClient(IOError(), IOError())
+
+        with pytest.raises(IOError):
+            RetryPolicy(max=1).request(get_meta(), client.request)
+
+    def test_not_idempotent_method(self, sleeps):
+        client = ScriptedClient(MockResp(503), MockResp(200))
+        resp = RetryPolicy().request(get_meta('post'), client.request)
+
+        assert resp.status_code == 503
+        assert len(client.sent) == 1
+
+    def test_rewind_body(self, sleeps):
+        body = io.BytesIO(b'header:body')
+        body.read(7)
+        bodies = []
+
+        def send(request_meta):
+            bodies.append(request_meta['files']['f'][1].read())
+            return MockResp(503 if len(bodies) == 1 else 200)
+
+        resp = RetryPolicy().request(
+            RequestMeta(method='put', files={'f': ('f.txt', body)}), send)
+
+        assert resp.retry_count == 1
+        assert bodies == [b'body', b'body']
+
+    def test_body_not_rewindable(self, sleeps):
+        client = ScriptedClient(MockResp(503), MockResp(200))
+        chunks = (chunk for chunk in [b'chunk'])
+        resp = RetryPolicy().request(RequestMeta(method='put', data=chunks), client.request)
+
+        assert resp.status_code == 503
+        assert len(client.sent) == 1
+
+    def test_retry_after(self, sleeps):
+        client = ScriptedClient(MockResp(503, {'Retry-After': '3'}), MockResp(200))
+        RetryPolicy().request(get_meta(), client.request)
+
+        assert sleeps == [3.0]
+
+    def test_retry_after_too_long(self, sleeps):
+        client = ScriptedClient(MockResp(503, {'Retry-After': '60'}), MockResp(200))
+        resp = RetryPolicy(backoff={'max': 10}).request(get_meta(), client.request)
+
+        assert resp.status_code == 503
+        assert sleeps == []
+
+    def test_budget(self, sleeps):
+        budget = RetryBudget(ratio=0.5, max_tokens=1)
+        policy = RetryPolicy(budget=budget)
+        client = ScriptedClient(*[MockResp(503)] * 4)
+
+        policy.request(get_meta(), client.request)
+        assert len(client.sent) == 2
+
+        policy.request(get_meta(), client.request)
+        assert len(client.sent) == 3
+
+    def test_backoff(self):
+        policy = RetryPolicy(backoff={'base': 1, 'factor': 2, 'max': 5})
+
+        assert all(0 <= policy.backoff(retry) <= min(5, 2 ** retry) for retry in range(5))
+
+    @pytest.mark.parametrize('retry_meta, max_retries', [
+        (2, 2), ({'max': 5, 'on_status': [500]}, 5)])
+    def test_from_meta(self, retry_meta, max_retries):
+        budget = RetryBudget()
+        policy = RetryPolicy.from_meta(retry_meta, budget)
+
+        assert policy.max_retries == max_retries
+        assert policy.budget is budget
+        assert RetryPolicy.from_meta(None) is None
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('2') == 2.0
+    assert parse_retry_after('Mon, 01 Jan 2018 00:00:00 GMT') == 0
+    assert parse_retry_after('invalid') is None
+    assert parse_retry_after(None) is None
+
+
+def test_api_retry(sleeps):
+    client = ScriptedClient(MockResp(502), MockResp(502), MockResp(200), MockResp(503))
+    consumer = Consumer('http://base', client=client, expected_status_code=200,
+                        retry={'max': 1})
+
+    @consumer.get('/uri')
+    def get_status(resp):
+        return resp.status_code
+
+    @consumer.get('/other')
+    def get_status_retry_more(resp):
+        """
+        <meta>
+            retry:
+                max: 3
+        </meta>
+        """
+        return resp.status_code
+
+    with pytest.raises(StatusCodeUnexpectedError):
+        get_status()
+
+    assert get_status_retry_more() == 200
+    assert get_status_retry_more.retry_policy.budget is consumer.retry_budget
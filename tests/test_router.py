@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from doclink.consumer import Consumer
+from doclink.router import (
+    RoundRobinRouter, LeastOutstandingRouter, EwmaRouter, ConsistentHashRouter)
+
+base_uris = ['http://a', 'http://b', 'http://c']
+
+
+class TestRouters(object):
+
+    def test_round_robin(self):
+        router = RoundRobinRouter(base_uris)
+
+        assert [router.get(None) for _ in range(4)] == base_uris + ['http://a']
+
+    def test_least_outstanding(self):
+        router = LeastOutstandingRouter(base_uris)
+        router.before_call('http://a')
+        router.before_call('http://b')
+
+        assert router.get(None) == 'http://c'
+
+        router.before_call('http://c')
+        router.before_call('http://c')
+        router.after_call('http://a', False, 0.1)
+
+        assert router.get(None) == 'http://a'
+
+    def test_ewma(self):
+        router = EwmaRouter(base_uris, alpha=0.5)
+        for base_uri, elapsed in zip(base_uris, [0.2, 0.1, 0.4]):
+            router.before_call(base_uri)
+            router.after_call(base_uri, False, elapsed)
+
+        assert router.get(None) == 'http://b'
+
+        router.before_call('http://b')
+        router.after_call('http://b', False, 0.5)
+
+        assert router.stats['http://b']['latency'] == pytest.approx(0.3)
+        assert router.get(None) == 'http://a'
+
+    def test_consistent_hash(self):
+        router = ConsistentHashRouter(base_uris)
+        selected = dict((key, router.get(key)) for key in range(100))
+
+        assert set(selected.values()) == set(base_uris)
+        assert all(router.get(key) == base_uri for key, base_uri in selected.items())
+
+        bigger_router = ConsistentHashRouter(base_uris + ['http://d'])
+        moved = [key for key, base_uri in selected.items() if bigger_router.get(key) != base_uri]
+
+        assert all(bigger_router.get(key) == 'http://d' for key in moved)
+
+    def test_eject(self, clock):
+        router = ConsistentHashRouter(base_uris, max_failures=2, eject_seconds=10)
+        key = next(key for key in range(100) if router.get(key) == 'http://a')
+
+        for _ in range(2):
+            router.before_call('http://a')
+            router.after_call('http://a', True, 0.1)
+
+        assert router.stats['http://a']['ejected']
+        assert router.get(key) != 'http://a'
+
+        clock.now += 10
+        assert router.get(key) == 'http://a'
+
+    def test_all_ejected(self, clock):
+        router = RoundRobinRouter(['http://a'], max_failures=1)
+        router.before_call('http://a')
+        router.after_call('http://a', True, 0.1)
+
+        assert router.get(None) == 'http://a'
+
+    def test_success_resets_failures(self):
+        router = RoundRobinRouter(base_uris, max_failures=2)
+        for failed in (True, False, True):
+            router.before_call('http://a')
+            router.after_call('http://a', failed, 0.1)
+
+        assert not router.stats['http://a']['ejected']
+
+    def test_unknown_base_uri(self):
+        router = RoundRobinRouter(base_uris)
+        router.before_call('http://other')
+        router.after_call('http://other', True, 0.1)
+
+        with pytest.raises(ValueError):
+            RoundRobinRouter([])
+
+
+class MockClient(object):
+
+    def __init__(self, failing):
+        self.failing = failing
+
+    def request(self, request_meta):
+        if request_meta['base_uri'] in self.failing:
+            raise IOError('connection refused')
+
+        return MockResp(200)
+
+
+class MockResp(object):
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+def test_consumer_routing(clock):
+    consumer = Consumer('http://default', client=MockClient(failing=['http://b']))
+    consumer.router = RoundRobinRouter(base_uris, max_failures=1)
+
+    @consumer.get('/uri')
+    def get_uri(resp):
+        return resp.caller
+
+    for _ in range(3):
+        try:
+            consumer.routing(None).get_uri()
+        except IOError:
+            pass
+
+    stats = consumer.router.stats
+    assert stats['http://b']['ejected']
+    assert all(host_stats['outstanding'] == 0 for host_stats in stats.values())
+    assert set(consumer.routing(None).base_uri for _ in range(4)) == {'http://a', 'http://c'}
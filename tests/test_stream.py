@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+import io
+import json
+
+import pytest
+
+from doclink import stream as stream_module
+from doclink.clients import RequestsClient
+from doclink.consumer import Consumer
+from doclink.stream import ResponseStream, StreamReader
+
+
+class MockResp(object):
+
+    def __init__(self, content, encoding='utf-8'):
+        self.content = content
+        self.encoding = encoding
+        self.raw = io.BytesIO(content)
+        self.closed = False
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding)
+
+    def iter_content(self, chunk_size):
+        return iter([self.content[i:i + chunk_size]
+                     for i in range(0, len(self.content), chunk_size)])
+
+    def iter_lines(self, chunk_size, decode_unicode=False):
+        return iter(self.text.split('\n'))
+
+    def close(self):
+        self.closed = True
+
+
+class TestResponseStream(object):
+
+    def test_chunks(self):
+        resp = MockResp(b'abcdefg')
+        stream = ResponseStream(resp, chunk_size=3)
+
+        assert list(stream) == [b'abc', b'def', b'g']
+        assert resp.closed
+
+    def test_lines(self):
+        stream = ResponseStream(MockResp(b'line1\n\nline2\n'), 'lines')
+
+        assert list(stream) == ['line1', 'line2']
+
+    def test_ndjson(self):
+        stream = ResponseStream(MockResp(b'{"id": 1}\n{"id": 2}\n'), 'ndjson')
+
+        assert list(stream) == [{'id': 1}, {'id': 2}]
+
+    @pytest.mark.parametrize('use_ijson', [True, False])
+    def test_json(self, monkeypatch, use_ijson):
+        if use_ijson:
+            pytest.importorskip('ijson')
+        else:
+            monkeypatch.setattr(stream_module, 'ijson', None)
+
+        content = json.dumps({'results': [{'id': 1}, {'id': 2}]}).encode('utf-8')
+        stream = ResponseStream(MockResp(content), 'json', prefix='results.item')
+
+        assert list(stream) == [{'id': 1}, {'id': 2}]
+
+    def test_close_early(self):
+        resp = MockResp(b'abcdefg')
+
+        with ResponseStream(resp, chunk_size=3) as stream:
+            assert next(stream) == b'abc'
+
+        assert resp.closed
+
+    def test_fallback_to_content(self):
+        resp = MockResp(b'line1\nline2')
+        del resp.raw
+        resp.iter_content = resp.iter_lines = None
+
+        assert list(ResponseStream(resp, chunk_size=5)) == [b'line1', b'\nline', b'2']
+
+    def test_unknown_mode(self):
+        with pytest.raises(ValueError):
+            ResponseStream(MockResp(b''), 'xml')
+
+    @pytest.mark.parametrize('stream_meta, mode', [
+        (True, 'chunks'), ('lines', 'lines'), ({'mode': 'json', 'prefix': 'item'}, 'json')])
+    def test_reader_from_meta(self, stream_meta, mode):
+        assert StreamReader.from_meta(stream_meta).mode == mode
+        assert StreamReader.from_meta(False) is None
+
+
+def test_api_stream(local_server):
+    client = RequestsClient(pool_maxsize=1)
+    consumer = Consumer(local_server, client=client, expected_status_code=200)
+
+    @consumer.get('/json-items/{count}')
+    def get_items(items):
+        """
+        <meta>
+            stream:
+                mode: json
+                chunk_size: 16
+        </meta>
+        """
+
+    @consumer.get('/json-items/{count}')
+    def count_items(items):
+        """
+        <meta>
+            stream: json
+        </meta>
+        """
+        return sum(1 for _ in items)
+
+    items = get_items(count=100)
+
+    assert isinstance(items, ResponseStream)
+    assert [stats['in_use'] for stats in client.pool_stats().values()] == [1]
+
+    assert list(items) == [{'id': i} for i in range(100)]
+    assert [stats['in_use'] for stats in client.pool_stats().values()] == [0]
+
+    assert count_items(count=10) == 10
+    assert [stats['in_use'] for stats in client.pool_stats().values()] == [0]
+
+
+def test_api_stream_closed_on_result(local_server):
+    client = RequestsClient(pool_maxsize=1)
+    consumer = Consumer(local_server, client=client, expected_status_code=200)
+
+    @consumer.get('/json-items/{count}')
+    def first_chunk(chunks):
+        """
+        <meta>
+            stream:
+                mode: chunks
+                chunk_size: 16
+        </meta>
+        """
+        return next(iter(chunks))
+
+    @consumer.resp_hook
+    def hook_result(resp):
+        if resp.input_kwargs.get('count') == 0:
+            return 'hooked'
+
+    assert len(first_chunk(count=1000)) == 16
+    assert [stats['in_use'] for stats in client.pool_stats().values()] == [0]
+
+    assert first_chunk(count=0) == 'hooked'
+    assert [stats['in_use'] for stats in client.pool_stats().values()] == [0]
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from doclink import tracing
+from doclink.consumer import Consumer
+from doclink.exceptions import StatusCodeUnexpectedError
+from doclink.tracing import TracingMiddleware
+
+from .conftest import MockResp, ScriptedClient
+
+
+def create_api(client, middleware):
+    consumer = Consumer('http://base', client=client, expected_status_code=200,
+                        retry={'max': 1})
+    consumer.use(middleware)
+
+    @consumer.post('/users/{id}')
+    def update_user(resp):
+        return resp.status_code
+
+    return update_user
+
+
+@pytest.fixture
+def exporter():
+    sdk_trace = pytest.importorskip('opentelemetry.sdk.trace')
+    in_memory = pytest.importorskip('opentelemetry.sdk.trace.export.in_memory_span_exporter')
+    export = pytest.importorskip('opentelemetry.sdk.trace.export')
+
+    exporter = in_memory.InMemorySpanExporter()
+    provider = sdk_trace.TracerProvider()
+    provider.add_span_processor(export.SimpleSpanProcessor(exporter))
+    exporter.provider = provider
+    return exporter
+
+
+def test_span(exporter):
+    client = ScriptedClient(MockResp(200, {'Content-Length': '12'}))
+    update_user = create_api(client, TracingMiddleware(tracer_provider=exporter.provider))
+
+    update_user(id=1, data=b'name=doclink')
+
+    span, = exporter.get_finished_spans()
+    assert span.name == 'update_user'
+    assert dict(span.attributes) == {
+        'http.request.method': 'POST',
+        'url.template': '/users/{id}',
+        'server.address': 'http://base',
+        'http.request.body.size': 12,
+        'http.response.status_code': 200,
+        'http.response.body.size': 12,
+    }
+
+    traceparent = client.sent[0]['headers']['traceparent']
+    assert traceparent.split('-')[1] == '{:032x}'.format(span.context.trace_id)
+
+
+def test_span_error_and_retries(exporter, sleeps):
+    client = ScriptedClient(503, 503)
+    consumer = Consumer('http://base', client=client, expected_status_code=200,
+                        retry={'max': 1})
+    consumer.use(TracingMiddleware(tracer_provider=exporter.provider))
+
+    @consumer.get('/users/{id}')
+    def get_user(resp):
+        pass
+
+    with pytest.raises(StatusCodeUnexpectedError):
+        get_user(id=1)
+
+    span, = exporter.get_finished_spans()
+    assert span.attributes['http.request.resend_count'] == 1
+    assert span.attributes['error.type'] == 'StatusCodeUnexpectedError'
+    assert not span.status.is_ok
+    assert client.sent[0]['headers']['traceparent'] == client.sent[1]['headers']['traceparent']
+
+
+def test_without_opentelemetry(monkeypatch):
+    monkeypatch.setattr(tracing, 'trace', None)
+    client = ScriptedClient(200)
+    update_user = create_api(client, TracingMiddleware())
+
+    assert update_user(id=1) == 200
+    assert client.sent[0].get('headers') is None
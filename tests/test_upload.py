@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+
+import json
+import threading
+
+import pytest
+
+from doclink.consumer import Consumer
+from doclink.exceptions import StatusCodeUnexpectedError
+from doclink.retry import RetryPolicy
+from doclink.upload import ChunkedUploader
+
+
+class ChunkClient(object):
+    """Client recording the chunks, failing the offsets in fail_offsets once."""
+
+    def __init__(self, fail_offsets=(), always_fail_offsets=()):
+        self.chunks = {}
+        self.fail_offsets = set(fail_offsets)
+        self.always_fail_offsets = set(always_fail_offsets)
+        self.sent = 0
+        self.lock = threading.Lock()
+
+    def request(self, request_meta):
+        offset = request_meta['params']['offset']
+
+        with self.lock:
+            self.sent += 1
+            if offset in self.always_fail_offsets:
+                raise IOError('connection reset')
+            if offset in self.fail_offsets:
+                self.fail_offsets.remove(offset)
+                raise IOError('connection reset')
+
+            self.chunks[offset] = (request_meta['params']['part'],
+                                   request_meta['headers']['Content-Range'],
+                                   request_meta['data'])
+
+        return MockResp(offset)
+
+
+class MockResp(object):
+
+    def __init__(self, offset):
+        self.status_code = 200
+        self.offset = offset
+
+
+@pytest.fixture
+def video(tmpdir):
+    path = tmpdir.join('video.mp4')
+    path.write_binary(b'0123456789' * 10 + b'end')
+    return str(path)
+
+
+def create_upload_api(client):
+    consumer = Consumer('http://base', client=client, expected_status_code=200)
+
+    @consumer.put('/upload/{upload_id}')
+    def upload_part(resp):
+        """
+        <meta>
+            args:
+                params:
+                    - part
+                    - offset
+                headers:
+                    - Content-Range
+            chunked_upload:
+                chunk_size: 10
+                concurrency: 3
+                retries: 1
+                index_arg: part
+                index_base: 1
+                offset_arg: offset
+                range_arg: Content-Range
+        </meta>
+        """
+        return resp.offset
+
+    return upload_part
+
+
+def test_upload_chunks(video, sleeps):
+    client = ChunkClient(fail_offsets=[30])
+    upload_part = create_upload_api(client)
+
+    results = upload_part.upload_chunks(video, upload_id='u1')
+
+    assert results == list(range(0, 110, 10))
+    assert client.sent == 12
+    assert len(sleeps) == 1
+    assert client.chunks[0] == (1, 'bytes 0-9/103', b'0123456789')
+    assert client.chunks[100] == (11, 'bytes 100-102/103', b'end')
+
+
+def test_upload_resume(video, tmpdir, sleeps):
+    checkpoint = str(tmpdir.join('video.checkpoint'))
+    client = ChunkClient(always_fail_offsets=[50])
+    upload_part = create_upload_api(client)
+
+    with pytest.raises(IOError):
+        upload_part.upload_chunks(video, checkpoint=checkpoint, upload_id='u1')
+
+    with open(checkpoint) as f:
+        done = json.load(f)['done']
+    assert '0' in done and '5' not in done
+
+    client = ChunkClient()
+    upload_part = create_upload_api(client)
+
+    results = upload_part.upload_chunks(video, checkpoint=checkpoint, upload_id='u1')
+
+    assert results == list(range(0, 110, 10))
+    assert client.sent == 11 - len(done)
+    assert not tmpdir.join('video.checkpoint').exists()
+
+
+def test_upload_empty_file(tmpdir):
+    path = tmpdir.join('empty')
+    path.write_binary(b'')
+    uploaded = []
+
+    assert ChunkedUploader().upload(lambda data: uploaded.append(data), str(path)) == [None]
+    assert uploaded == [b'']
+
+
+def test_from_meta():
+    assert ChunkedUploader.from_meta(1024).chunk_size == 1024
+    assert ChunkedUploader.from_meta({'concurrency': 2}).concurrency == 2
+
+    with pytest.raises(ValueError):
+        ChunkedUploader(chunk_size=0)
+
+
+def test_upload_not_retryable(video, sleeps):
+    class StatusClient(ChunkClient):
+        def request(self, request_meta):
+            resp = super(StatusClient, self).request(request_meta)
+            resp.status_code = 400 if resp.offset == 30 else 200
+            return resp
+
+    client = StatusClient()
+    upload_part = create_upload_api(client)
+
+    with pytest.raises(StatusCodeUnexpectedError):
+        upload_part.upload_chunks(video, upload_id='u1')
+
+    assert sleeps == []
+
+
+def test_upload_with_api_retry(video, sleeps):
+    client = ChunkClient(fail_offsets=[30])
+    upload_part = create_upload_api(client)
+    upload_part.retry_policy = RetryPolicy(max=2)
+
+    assert upload_part.upload_chunks(video, upload_id='u1') == list(range(0, 110, 10))
+    assert client.sent == 12
+    assert len(sleeps) == 1
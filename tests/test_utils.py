@@ -2,6 +2,8 @@
 
 import unittest
 
+from uritemplate import URITemplate
+
 from doclink import utils
 
 
@@ -92,3 +94,40 @@ class ArgNormalizerTestCase(unittest.TestCase):
                     'required': False})
             }
         )
+
+    def test_normalized_arg(self):
+        normalized = utils.ArgNormalizer.normalize(self.multi_arg)
+        result = utils.ArgNormalizer.normalize(list(normalized.values()))
+
+        self.assertEqual(result, normalized)
+
+
+class CompiledUriTemplateTestCase(unittest.TestCase):
+
+    def test_compile_uri_template_cached(self):
+        compiled = utils.compile_uri_template('/uri/{arg1}', 'http://base')
+
+        self.assertIs(compiled, utils.compile_uri_template('/uri/{arg1}', 'http://base'))
+        self.assertIsNot(compiled, utils.compile_uri_template('/uri/{arg1}', 'http://other'))
+        self.assertEqual(compiled.uri, 'http://base/uri/{arg1}')
+
+    def test_expand_simple(self):
+        compiled = utils.CompiledUriTemplate('http://base/{arg1}/{arg2}')
+
+        self.assertIsNotNone(compiled._format_str)
+        self.assertEqual(compiled.expand({'arg1': u'é /?', 'arg2': 2}),
+                         'http://base/%C3%A9%20%2F%3F/2')
+
+    def test_expand_same_as_uritemplate(self):
+        cases = [
+            ('/{arg1}/{arg2}', {'arg1': 'value1', 'arg2': 1.5}),
+            ('/{arg1}/{arg2}', {'arg1': 'value1'}),
+            ('/{arg1}/{arg2}', {'arg1': ['a', 'b'], 'arg2': None}),
+            ('/{arg1=default}', {}),
+            ('/{+arg1}{?arg2}', {'arg1': 'a/b', 'arg2': 'c'}),
+            ('/}literal/{arg1}', {'arg1': True}),
+        ]
+
+        for uri, var_dict in cases:
+            compiled = utils.CompiledUriTemplate(uri)
+            self.assertEqual(compiled.expand(var_dict), URITemplate(uri).expand(var_dict))